@@ -126,7 +126,9 @@ async def create_floor_plan(
     
     # Convertir les éléments en XML si fournis
     floor_plan_service = FloorPlanService()
-    xml_data = floor_plan_service.elements_to_xml(plan_data.elements or [])
+    xml_data = floor_plan_service.elements_to_xml(
+        [element.model_dump() for element in plan_data.elements or []]
+    )
     
     # Créer le plan
     plan = FloorPlan(
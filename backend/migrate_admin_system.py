@@ -101,12 +101,16 @@ def run_migration():
             else:
                 print(f"   [INFO] Colonne {col_name} déjà présente")
         
+        # Index pour les requêtes du panel admin (dashboard, liste, alertes)
+        print("\n7. Création des index admin...")
+        create_admin_indexes(engine, session)
+        
         # Commit des changements
         session.commit()
-        print("\n7. Migration terminée avec succès!")
+        print("\n8. Migration terminée avec succès!")
         
         # Créer un super admin par défaut si aucun admin n'existe
-        print("\n8. Vérification des administrateurs...")
+        print("\n9. Vérification des administrateurs...")
         try:
             admin_count = session.execute(text("SELECT COUNT(*) FROM admin_users")).scalar()
             if admin_count == 0:
@@ -138,6 +142,37 @@ def run_migration():
     return True
 
 
+# (nom de l'index, table, colonnes)
+ADMIN_INDEXES = [
+    # Croissance / nouveaux utilisateurs du dashboard
+    ("idx_user_auth_created_at", "user_auth", "created_at"),
+    # Filtres du dashboard par statut et alerte des utilisateurs non vérifiés
+    ("idx_user_auth_status_created", "user_auth", "user_status, created_at"),
+    ("idx_user_auth_verified_created", "user_auth", "email_verified, created_at"),
+    # Alerte des suspensions expirant bientôt
+    ("idx_user_auth_status_suspension", "user_auth", "user_status, suspension_expires_at"),
+]
+
+
+def create_admin_indexes(engine, session):
+    """Crée les index admin dont toutes les colonnes existent"""
+    inspector = inspect(engine)
+    table_columns = {}
+    
+    for index_name, table_name, columns in ADMIN_INDEXES:
+        if table_name not in table_columns:
+            table_columns[table_name] = {col['name'] for col in inspector.get_columns(table_name)}
+        missing = [col.strip() for col in columns.split(",") if col.strip() not in table_columns[table_name]]
+        if missing:
+            print(f"   [INFO] Index {index_name} ignoré (colonne(s) absente(s): {', '.join(missing)})")
+            continue
+        try:
+            session.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({columns})"))
+            print(f"   [OK] Index {index_name} créé")
+        except SQLAlchemyError as e:
+            print(f"   [WARNING] Index {index_name}: {e}")
+
+
 def rollback_migration():
     """Rollback de la migration admin (pour les tests)"""
     
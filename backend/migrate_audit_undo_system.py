@@ -86,6 +86,10 @@ def run_migration():
             ON audit_logs_enhanced (entity_type, entity_id, created_at DESC)
             """,
             """
+            CREATE INDEX IF NOT EXISTS idx_audit_enhanced_user_timeline 
+            ON audit_logs_enhanced (user_id, created_at, is_undoable, transaction_group_id, undo_complexity)
+            """,
+            """
             CREATE INDEX IF NOT EXISTS idx_notifications_unread 
             ON user_notifications (user_id, is_read, priority, created_at DESC)
             """,
@@ -105,18 +109,35 @@ def run_migration():
                 else:
                     print(f"   [WARNING] Erreur création index: {e}")
         
+        # Colonnes ajoutées après la création initiale des tables
+        print("\n6. Ajout des colonnes manquantes...")
+        backup_columns = {column["name"] for column in inspect(engine).get_columns("data_backups")}
+        if "full_backup_data_gz" not in backup_columns:
+            session.execute(text("ALTER TABLE data_backups ADD COLUMN full_backup_data_gz LONGBLOB NULL"))
+            print("   [OK] Colonne data_backups.full_backup_data_gz ajoutée")
+        else:
+            print("   [INFO] Colonne data_backups.full_backup_data_gz déjà présente")
+        if "files_backup_status" not in backup_columns:
+            session.execute(text(
+                "ALTER TABLE data_backups ADD COLUMN files_backup_status "
+                "ENUM('PENDING', 'DONE', 'FAILED') NULL"
+            ))
+            print("   [OK] Colonne data_backups.files_backup_status ajoutée")
+        else:
+            print("   [INFO] Colonne data_backups.files_backup_status déjà présente")
+        
         # Créer le dossier de backup
-        print("\n6. Création du dossier de backup...")
+        print("\n7. Création du dossier de backup...")
         backup_dir = "backups/entities"
         os.makedirs(backup_dir, exist_ok=True)
         print(f"   [OK] Dossier {backup_dir} créé")
         
         # Commit des changements
         session.commit()
-        print("\n7. Migration terminée avec succès!")
+        print("\n8. Migration terminée avec succès!")
         
         # Statistiques
-        print("\n8. Statistiques de migration...")
+        print("\n9. Statistiques de migration...")
         try:
             audit_count = session.execute(text("SELECT COUNT(*) FROM audit_logs_enhanced")).scalar()
             backup_count = session.execute(text("SELECT COUNT(*) FROM data_backups")).scalar()
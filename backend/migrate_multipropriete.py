@@ -125,12 +125,15 @@ class MultiproprieteMigration:
             ("idx_property_groups_sponsor", "property_groups", "sponsor_id"),
             ("idx_property_groups_status", "property_groups", "group_status"),
             ("idx_property_groups_type", "property_groups", "group_type"),
+            ("idx_property_groups_sponsor_status", "property_groups", "sponsor_id, group_status"),
             
             # Index pour property_group_members
             ("idx_group_members_group", "property_group_members", "group_id"),
             ("idx_group_members_user", "property_group_members", "user_id"),
             ("idx_group_members_status", "property_group_members", "membership_status"),
             ("idx_group_members_composite", "property_group_members", "group_id, user_id"),
+            ("idx_group_members_user_status", "property_group_members", "user_id, membership_status"),
+            ("idx_group_members_group_status", "property_group_members", "group_id, membership_status"),
             
             # Index pour property_group_invitations
             ("idx_group_invitations_group", "property_group_invitations", "group_id"),
@@ -151,6 +154,35 @@ class MultiproprieteMigration:
                 print(f"   [OK] Index {index_name} créé")
             except Exception as e:
                 print(f"   [WARNING] Index {index_name}: {e}")
+        
+        # Un seul membership par (groupe, utilisateur) : l'upsert à l'acceptation
+        # d'invitation n'est sûr qu'avec cet index. Les doublons existants sont
+        # supprimés (la ligne la plus récente est conservée) avant de le créer
+        result = self.session.execute(text("""
+            DELETE older FROM property_group_members older
+            JOIN property_group_members newer
+              ON newer.group_id = older.group_id
+             AND newer.user_id = older.user_id
+             AND newer.id > older.id
+        """))
+        if result.rowcount:
+            print(f"   [OK] {result.rowcount} membership(s) en double supprimé(s)")
+        
+        unique_indexes_to_create = [
+            ("uq_group_members_group_user", "property_group_members", "group_id, user_id"),
+        ]
+        
+        for index_name, table_name, columns in unique_indexes_to_create:
+            try:
+                self.session.execute(text(f"""
+                    CREATE UNIQUE INDEX IF NOT EXISTS {index_name} 
+                    ON {table_name} ({columns})
+                """))
+                print(f"   [OK] Index unique {index_name} créé")
+            except Exception as e:
+                # Sans cet index l'upsert insérerait des doublons : migration interrompue
+                print(f"   [ERROR] Index unique {index_name}: {e}")
+                raise
     
     def verify_migration(self):
         """Vérifie que la migration s'est bien déroulée"""
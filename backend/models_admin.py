@@ -9,6 +9,37 @@ from database import Base
 from enums import AdminRole, UserStatus, AccountAction
 from model_mixins import TimestampMixin, AuditMixin
 import json
+from typing import Union
+
+
+# Permissions admin sous forme de bits : une combinaison se teste par un ET binaire
+PERM_MANAGE_USERS = 1 << 0
+PERM_MANAGE_SUBSCRIPTIONS = 1 << 1
+PERM_VIEW_FINANCES = 1 << 2
+PERM_MANAGE_PROPERTIES = 1 << 3
+PERM_ACCESS_AUDIT_LOGS = 1 << 4
+PERM_MANAGE_ADMINS = 1 << 5
+ALL_PERMISSIONS = (1 << 6) - 1
+
+# Bit -> colonne booléenne qui le porte (les colonnes restent la source de vérité)
+PERMISSION_COLUMNS = {
+    PERM_MANAGE_USERS: "can_manage_users",
+    PERM_MANAGE_SUBSCRIPTIONS: "can_manage_subscriptions",
+    PERM_VIEW_FINANCES: "can_view_finances",
+    PERM_MANAGE_PROPERTIES: "can_manage_properties",
+    PERM_ACCESS_AUDIT_LOGS: "can_access_audit_logs",
+    PERM_MANAGE_ADMINS: "can_manage_admins",
+}
+
+# Nom de permission -> bit, résolu une fois au chargement (nom inconnu : refusé)
+PERMISSION_MASKS = {
+    "manage_users": PERM_MANAGE_USERS,
+    "manage_subscriptions": PERM_MANAGE_SUBSCRIPTIONS,
+    "view_finances": PERM_VIEW_FINANCES,
+    "manage_properties": PERM_MANAGE_PROPERTIES,
+    "access_audit_logs": PERM_ACCESS_AUDIT_LOGS,
+    "manage_admins": PERM_MANAGE_ADMINS,
+}
 
 
 class AdminUser(Base, TimestampMixin):
@@ -62,8 +93,22 @@ class AdminUser(Base, TimestampMixin):
             "can_manage_admins": self.can_manage_admins
         }
     
-    def has_permission(self, permission: str) -> bool:
-        """Vérifie si l'admin a une permission spécifique"""
+    @property
+    def permissions_mask(self) -> int:
+        """Permissions de l'admin en bits PERM_* (toutes pour un super admin)"""
+        if self.admin_role == AdminRole.SUPER_ADMIN:
+            return ALL_PERMISSIONS
+        mask = 0
+        for bit, column in PERMISSION_COLUMNS.items():
+            if getattr(self, column):
+                mask |= bit
+        return mask
+    
+    def has_permission(self, permission: Union[str, int]) -> bool:
+        """
+        Vérifie si l'admin a une permission spécifique
+        Accepte un nom de permission ou un masque PERM_* (toutes les permissions du masque requises)
+        """
         if not self.is_active:
             return False
         
@@ -71,16 +116,12 @@ class AdminUser(Base, TimestampMixin):
         if self.admin_role == AdminRole.SUPER_ADMIN:
             return True
         
-        permission_map = {
-            "manage_users": self.can_manage_users,
-            "manage_subscriptions": self.can_manage_subscriptions,
-            "view_finances": self.can_view_finances,
-            "manage_properties": self.can_manage_properties,
-            "access_audit_logs": self.can_access_audit_logs,
-            "manage_admins": self.can_manage_admins
-        }
+        if isinstance(permission, str):
+            # Nom résolu en bit par la table précalculée : une seule colonne lue
+            bit = PERMISSION_MASKS.get(permission)
+            return bit is not None and bool(getattr(self, PERMISSION_COLUMNS[bit]))
         
-        return permission_map.get(permission, False)
+        return bool(permission) and (self.permissions_mask & permission) == permission
 
 
 class AdminAction(Base, TimestampMixin):
@@ -2,24 +2,53 @@
 Modèles d'audit enrichis pour le système d'undo
 Backup complet et traçabilité avancée
 """
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Text, Enum, JSON, Index
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Text, Enum, JSON, Index, LargeBinary
+from sqlalchemy.dialects.mysql import LONGBLOB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
 from enums import ActionType, EntityType, AdminRole
 from model_mixins import TimestampMixin
+import gzip
 import json
+import os
+import time
 import uuid
 from datetime import datetime, timedelta
 import enum
 
 
+# Durée de rétention (et de possibilité d'undo) d'un log d'audit enrichi
+AUDIT_RETENTION_DAYS = 7
+
+
+def new_transaction_group_id() -> str:
+    """
+    Identifiant de groupe au format UUIDv7 (RFC 9562) : les 48 premiers bits sont
+    l'horodatage en millisecondes, les nouveaux groupes s'insèrent donc en fin
+    d'index au lieu de se disperser dans tout l'arbre comme un UUIDv4
+    """
+    value = (time.time_ns() // 1_000_000 & 0xFFFF_FFFF_FFFF) << 80
+    value |= int.from_bytes(os.urandom(10), "big")
+    value = value & ~(0xF << 76) | (0x7 << 76)  # version 7
+    value = value & ~(0x3 << 62) | (0x2 << 62)  # variante RFC
+    return str(uuid.UUID(int=value))
+
+
 class UndoComplexity(str, enum.Enum):
     """Niveaux de complexité pour l'undo"""
     SIMPLE = "simple"           # UPDATE simple, pas de dépendances
     MODERATE = "moderate"       # CREATE/DELETE avec peu de dépendances
     COMPLEX = "complex"         # DELETE avec beaucoup de dépendances
     IMPOSSIBLE = "impossible"   # Actions non-undoables (LOGIN, EMAIL, etc.)
+    
+    @property
+    def rank(self) -> int:
+        """Rang d'escalade d'un groupe : SIMPLE < MODERATE < COMPLEX (IMPOSSIBLE compte comme SIMPLE)"""
+        return _UNDO_COMPLEXITY_RANKS.get(self, 0)
+
+
+_UNDO_COMPLEXITY_RANKS = {UndoComplexity.MODERATE: 1, UndoComplexity.COMPLEX: 2}
 
 
 class UndoStatus(str, enum.Enum):
@@ -31,6 +60,13 @@ class UndoStatus(str, enum.Enum):
     CANCELLED = "cancelled"     # Annulé par admin
 
 
+class FileBackupStatus(str, enum.Enum):
+    """Statut de la copie des fichiers d'un backup (faite après le commit de l'audit)"""
+    PENDING = "pending"         # Copie planifiée, pas encore faite
+    DONE = "done"               # Fichiers copiés dans files_backup_path
+    FAILED = "failed"           # Échec de la copie
+
+
 class NotificationType(str, enum.Enum):
     """Types de notifications utilisateur"""
     ADMIN_ACTION = "admin_action"       # Action admin sur le compte
@@ -48,7 +84,7 @@ class AuditLogEnhanced(Base, TimestampMixin):
     id = Column(Integer, primary_key=True, index=True)
     
     # Groupe de transaction pour actions liées
-    transaction_group_id = Column(String(36), nullable=False, index=True, default=lambda: str(uuid.uuid4()))
+    transaction_group_id = Column(String(36), nullable=False, index=True, default=new_transaction_group_id)
     
     # Informations de base
     user_id = Column(Integer, ForeignKey("user_auth.id"), nullable=True)
@@ -81,7 +117,7 @@ class AuditLogEnhanced(Base, TimestampMixin):
     status_code = Column(Integer, nullable=True)
     
     # Expiration et rétention
-    expires_at = Column(DateTime, nullable=False, default=lambda: datetime.utcnow() + timedelta(days=7))
+    expires_at = Column(DateTime, nullable=False, default=lambda: datetime.utcnow() + timedelta(days=AUDIT_RETENTION_DAYS))
     
     # Relations
     user = relationship("UserAuth")
@@ -90,8 +126,11 @@ class AuditLogEnhanced(Base, TimestampMixin):
     
     # Index pour optimiser les requêtes
     __table_args__ = (
-        Index('idx_audit_enhanced_user_date', 'user_id', 'created_at'),
-        Index('idx_audit_enhanced_entity', 'entity_type', 'entity_id'),
+        # Couvrant pour l'agrégation de la timeline (filtre user/date, groupe, complexité)
+        Index('idx_audit_enhanced_user_timeline', 'user_id', 'created_at', 'is_undoable',
+              'transaction_group_id', 'undo_complexity'),
+        # Modifications ultérieures d'une entité (pré-requis d'undo)
+        Index('idx_audit_enhanced_entity_recent', 'entity_type', 'entity_id', 'created_at'),
         Index('idx_audit_enhanced_transaction', 'transaction_group_id'),
         Index('idx_audit_enhanced_undoable', 'is_undoable', 'undo_complexity'),
         Index('idx_audit_enhanced_expires', 'expires_at'),
@@ -171,9 +210,11 @@ class DataBackup(Base, TimestampMixin):
     entity_id = Column(Integer, nullable=False)
     
     # Données complètes
-    full_backup_data = Column(JSON, nullable=False)  # Backup JSON complet
+    full_backup_data = Column(JSON, nullable=False)  # Backup JSON complet (null si compressé)
+    full_backup_data_gz = Column(LargeBinary().with_variant(LONGBLOB, "mysql"), nullable=True)  # JSON gzippé (gros backups)
     relationships_data = Column(JSON, nullable=True)  # Relations liées
-    files_backup_path = Column(String(500), nullable=True)  # Chemin backup fichiers
+    files_backup_path = Column(String(500), nullable=True)  # Chemin backup fichiers (renseigné une fois copiés)
+    files_backup_status = Column(Enum(FileBackupStatus), nullable=True)  # Null si aucun fichier à copier
     
     # Métadonnées
     backup_size_bytes = Column(Integer, nullable=True)
@@ -185,6 +226,13 @@ class DataBackup(Base, TimestampMixin):
     # Relations
     audit_log = relationship("AuditLogEnhanced")
     
+    @property
+    def backup_data(self):
+        """Données sauvegardées, décompressées si le backup est stocké gzippé"""
+        if self.compression_used and self.full_backup_data_gz is not None:
+            return json.loads(gzip.decompress(self.full_backup_data_gz))
+        return self.full_backup_data
+    
     # Index
     __table_args__ = (
         Index('idx_backup_entity', 'entity_type', 'entity_id'),
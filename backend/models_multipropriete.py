@@ -2,7 +2,7 @@
 Modèles pour le système de multipropriété (SCI)
 Gestion des groupes de propriété partagée avec sponsor Premium
 """
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Text, Enum
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Text, Enum, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -60,6 +60,11 @@ class PropertyGroup(Base, TimestampMixin, StatusMixin):
     members = relationship("PropertyGroupMember", back_populates="group", cascade="all, delete-orphan")
     apartments = relationship("Apartment", back_populates="property_group")
     
+    # Index pour optimiser les requêtes (groupes actifs d'un sponsor)
+    __table_args__ = (
+        Index('idx_property_groups_sponsor_status', 'sponsor_id', 'group_status'),
+    )
+    
     def __str__(self):
         return f"{self.name} (Sponsor: {self.sponsor.email if self.sponsor else 'N/A'})"
     
@@ -108,6 +113,14 @@ class PropertyGroupMember(Base, TimestampMixin):
     user = relationship("UserAuth", foreign_keys=[user_id], back_populates="group_memberships")
     invited_by = relationship("UserAuth", foreign_keys=[invited_by_id])
     
+    # Un seul membership par (groupe, utilisateur) ; index pour optimiser les requêtes
+    # (memberships actifs d'un utilisateur / d'un groupe)
+    __table_args__ = (
+        UniqueConstraint('group_id', 'user_id', name='uq_group_members_group_user'),
+        Index('idx_group_members_user_status', 'user_id', 'membership_status'),
+        Index('idx_group_members_group_status', 'group_id', 'membership_status'),
+    )
+    
     def __str__(self):
         return f"{self.user.email if self.user else 'Unknown'} in {self.group.name if self.group else 'Unknown'}"
     
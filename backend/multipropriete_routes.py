@@ -90,12 +90,11 @@ async def get_my_accessible_apartments(
     Récupère tous les appartements accessibles (personnels + groupes)
     """
     try:
-        apartments_data = MultiproprietService.get_user_accessible_apartments(db, current_user.id)
-        
-        # Transformer en format de réponse
+        # Transformer en format de réponse en un seul parcours (les entrées sont streamées)
         apartments_info = []
-        for apt_data in apartments_data:
-            apartment = apt_data["apartment"]
+        counts_by_type = {"personal": 0, "sponsored": 0, "member": 0}
+        for apt_data in MultiproprietService.get_user_accessible_apartments(db, current_user.id):
+            counts_by_type[apt_data["access_type"]] += 1
             
             # Déterminer les permissions
             can_edit = apt_data["access_type"] in ["personal", "sponsored"]
@@ -104,9 +103,11 @@ async def get_my_accessible_apartments(
             can_manage_finances = apt_data["access_type"] in ["personal", "sponsored"]
             
             apartments_info.append({
-                "apartment_id": apartment.id,
-                "apartment_name": apartment.name,
-                "building_name": apartment.building.name if apartment.building else None,
+                "apartment_id": apt_data["apartment_id"],
+                "apartment_name": " - ".join(
+                    part for part in (apt_data["building_name"], apt_data["type_logement"]) if part
+                ) or f"Appartement {apt_data['apartment_id']}",
+                "building_name": apt_data["building_name"],
                 "access_type": apt_data["access_type"],
                 "role": apt_data["role"],
                 "group_name": apt_data["group_name"],
@@ -117,17 +118,12 @@ async def get_my_accessible_apartments(
                 "can_manage_finances": can_manage_finances
             })
         
-        # Compter par type
-        personal_count = len([a for a in apartments_data if a["access_type"] == "personal"])
-        sponsored_count = len([a for a in apartments_data if a["access_type"] == "sponsored"])
-        member_count = len([a for a in apartments_data if a["access_type"] == "member"])
-        
         return UserApartmentsAccessOut(
             apartments=apartments_info,
             total_count=len(apartments_info),
-            personal_count=personal_count,
-            sponsored_count=sponsored_count,
-            member_count=member_count
+            personal_count=counts_by_type["personal"],
+            sponsored_count=counts_by_type["sponsored"],
+            member_count=counts_by_type["member"]
         )
         
     except Exception as e:
@@ -3,8 +3,10 @@ Routes API pour l'administration
 Panel administrateur avec toutes les fonctionnalités
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import Response
 from sqlalchemy.orm import Session
 from typing import Optional, List
+import os
 
 from database import get_db
 from auth import get_current_user
@@ -16,7 +18,8 @@ from schemas_admin import (
     UserActionRequest, UserActionResponse, AdminUserCreate, AdminUserOut,
     AdminUserUpdate, AdminNotificationOut, SystemSettingOut, 
     SystemSettingCreate, SystemSettingUpdate, SearchResults, SearchQuery,
-    AdminStatsOut, AdminStatsQuery
+    AdminStatsOut, AdminStatsQuery, UsersListColumnarOut,
+    users_list_from_trusted, users_list_columns
 )
 from error_handlers import PermissionErrorHandler, BusinessLogicErrorHandler
 from audit_logger import AuditLogger
@@ -26,6 +29,47 @@ from enums import AdminRole, EntityType, ActionType
 # Router principal pour l'administration
 admin_router = APIRouter(prefix="/admin", tags=["Administration"])
 
+# Cache Redis du dashboard (JSON pré-sérialisé), actif si REDIS_URL est configuré
+DASHBOARD_CACHE_KEY = "admin:dashboard:v1"
+DASHBOARD_CACHE_TTL = 60
+
+try:
+    import redis
+    _redis_url = os.getenv("REDIS_URL")
+    dashboard_cache = redis.from_url(_redis_url) if _redis_url else None
+except ImportError:
+    dashboard_cache = None
+
+
+def _read_dashboard_cache() -> Optional[bytes]:
+    """Récupère le JSON du dashboard en cache, None si absent ou Redis indisponible"""
+    if dashboard_cache is None:
+        return None
+    try:
+        return dashboard_cache.get(DASHBOARD_CACHE_KEY)
+    except redis.RedisError:
+        return None
+
+
+def _write_dashboard_cache(payload: bytes):
+    """Stocke le JSON du dashboard pour DASHBOARD_CACHE_TTL secondes"""
+    if dashboard_cache is None:
+        return
+    try:
+        dashboard_cache.set(DASHBOARD_CACHE_KEY, payload, ex=DASHBOARD_CACHE_TTL)
+    except redis.RedisError:
+        pass
+
+
+def invalidate_dashboard_cache():
+    """Invalide le dashboard en cache (changement de statut utilisateur, etc.)"""
+    if dashboard_cache is None:
+        return
+    try:
+        dashboard_cache.delete(DASHBOARD_CACHE_KEY)
+    except redis.RedisError:
+        pass
+
 
 # === MIDDLEWARE DE SÉCURITÉ ADMIN ===
 
@@ -79,6 +123,7 @@ def get_admin_dashboard(
 ):
     """
     Récupère les données du tableau de bord administrateur
+    (servi depuis le cache Redis s'il est encore valide)
     """
     # Vérifier permission
     if not admin_user.has_permission("view_dashboard"):
@@ -87,11 +132,15 @@ def get_admin_dashboard(
             detail="Permission view_dashboard requise"
         )
     
+    cached = _read_dashboard_cache()
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+    
     try:
         dashboard_data = AdminService.get_admin_dashboard(db, admin_user.user_id)
         
         # Convertir en schéma Pydantic
-        return AdminDashboardOut(
+        dashboard = AdminDashboardOut(
             stats={
                 "total_users": dashboard_data.total_users,
                 "active_users": dashboard_data.active_users,
@@ -135,6 +184,11 @@ def get_admin_dashboard(
             ]
         )
         
+        # Sérialisé une seule fois, puis réutilisé tel quel depuis le cache
+        payload = dashboard.model_dump_json().encode()
+        _write_dashboard_cache(payload)
+        return Response(content=payload, media_type="application/json")
+        
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -153,6 +207,7 @@ async def get_users_list(
     subscription_filter: Optional[str] = Query(None),
     sort_by: str = Query("created_at"),
     sort_order: str = Query("desc"),
+    cursor: Optional[str] = Query(None, max_length=64),
     admin_user: AdminUser = Depends(require_admin_permission("manage_users")),
     db: Session = Depends(get_db)
 ):
@@ -169,11 +224,72 @@ async def get_users_list(
             status_filter=status_filter,
             subscription_filter=subscription_filter,
             sort_by=sort_by,
-            sort_order=sort_order
+            sort_order=sort_order,
+            cursor=cursor
+        )
+        
+        # Sérialisation JSON en une passe (dates formatées une seule fois par
+        # pydantic-core), sans le model_dump / revalidation de response_model
+        return Response(
+            content=users_list_from_trusted(users_data).model_dump_json(),
+            media_type="application/json"
+        )
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors du chargement des utilisateurs: {str(e)}"
+        )
+
+
+@admin_router.get("/users/columnar", response_model=UsersListColumnarOut)
+async def get_users_list_columnar(
+    page: int = Query(1, ge=1),
+    per_page: int = Query(50, ge=1, le=100),
+    search: Optional[str] = Query(None),
+    status_filter: Optional[str] = Query(None),
+    subscription_filter: Optional[str] = Query(None),
+    sort_by: str = Query("created_at"),
+    sort_order: str = Query("desc"),
+    cursor: Optional[str] = Query(None, max_length=64),
+    admin_user: AdminUser = Depends(require_admin_permission("manage_users")),
+    db: Session = Depends(get_db)
+):
+    """
+    Liste paginée des utilisateurs au format colonnes (une liste par champ),
+    sérialisée directement avec orjson sans objet Pydantic par ligne
+    """
+    import orjson
+    
+    try:
+        users_data = AdminService.get_users_list(
+            db=db,
+            admin_user_id=admin_user.user_id,
+            page=page,
+            per_page=per_page,
+            search=search,
+            status_filter=status_filter,
+            subscription_filter=subscription_filter,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            cursor=cursor
         )
         
-        return UsersListOut(**users_data)
+        return Response(
+            content=orjson.dumps(users_list_columns(users_data)),
+            media_type="application/json"
+        )
         
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -232,6 +348,7 @@ async def perform_user_action(
         )
         
         if success:
+            invalidate_dashboard_cache()
             return UserActionResponse(
                 success=True,
                 message=f"Action {action_request.action} effectuée avec succès",
@@ -46,11 +46,16 @@ def get_user_audit_timeline(
     user_id: int,
     days: int = Query(7, ge=1, le=30),
     include_non_undoable: bool = Query(True),
+    max_groups: Optional[int] = Query(None, ge=1, le=500),
+    before_at: Optional[datetime] = Query(None),
+    before_group_id: Optional[str] = Query(None, max_length=36),
     admin_user: AdminUser = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """
     Récupère la timeline d'audit d'un utilisateur avec actions groupées
+    (limitée aux `max_groups` groupes les plus récents si précisé ; page suivante
+    via `before_at`/`before_group_id` repris de `next_cursor`)
     """
     # Vérifier permissions
     if not admin_user.has_permission("manage_users"):
@@ -74,9 +79,19 @@ def get_user_audit_timeline(
             user_id=user_id,
             days=days,
             include_non_undoable=include_non_undoable,
-            admin_role=admin_user.admin_role
+            admin_role=admin_user.admin_role,
+            max_groups=max_groups,
+            before=(before_at, before_group_id) if before_at and before_group_id else None
         )
         
+        # Curseur de la page suivante si la page est pleine
+        next_cursor = None
+        if max_groups and len(timeline) == max_groups:
+            next_cursor = {
+                "before_at": timeline[-1]["created_at"],
+                "before_group_id": timeline[-1]["group_id"]
+            }
+        
         return {
             "user_id": user_id,
             "user_info": {
@@ -86,6 +101,7 @@ def get_user_audit_timeline(
             "timeline_period_days": days,
             "total_action_groups": len(timeline),
             "timeline": timeline,
+            "next_cursor": next_cursor,
             "admin_permissions": {
                 "can_undo_simple": admin_user.admin_role in [AdminRole.SUPER_ADMIN, AdminRole.USER_MANAGER, AdminRole.SUPPORT],
                 "can_undo_moderate": admin_user.admin_role in [AdminRole.SUPER_ADMIN, AdminRole.SUPPORT],
@@ -1,18 +1,38 @@
-from pydantic import BaseModel, EmailStr, Field, field_validator
-from typing import Optional, List
-from datetime import datetime
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, StringConstraints, field_validator
+from typing import Annotated, Optional, List, Dict, Union
+from datetime import date, datetime
 from decimal import Decimal
-from enum import Enum
 import re
 
+import email_validator
+
 # Import centralisé des enums
 from enums import (
     UserRole, PhotoType, RoomType, ActionType, EntityType,
     SubscriptionType, SubscriptionStatus, PaymentStatus, AuthType,
     FloorPlanType, DocumentType, LeaseStatus, TenantStatus,
-    InvitationStatus, InventoryItemCondition, PropertyCondition
+    InvitationStatus, InventoryItemCondition, PropertyCondition, InventoryType
 )
 
+# Chaînes obligatoires : espaces retirés et longueur vérifiés directement par pydantic-core
+NonEmptyStr50 = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, max_length=50)]
+NonEmptyStr100 = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, max_length=100)]
+NonEmptyStr255 = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, max_length=255)]
+
+# Alias partagés pour les nombreux champs optionnels (copropriété, syndic)
+OptStr = Optional[str]
+OptInt = Optional[int]
+OptBool = Optional[bool]
+
+
+def _validate_email(value: str) -> str:
+    """Validation syntaxique de l'email (sans vérification DNS), forme normalisée"""
+    return email_validator.validate_email(value, check_deliverability=False).normalized
+
+
+# Remplace EmailStr : validateur email-validator>=2 résolu une seule fois au niveau du module
+FastEmail = Annotated[str, AfterValidator(_validate_email)]
+
 class AddressBase(BaseModel):
     street_number: Optional[str] = Field(None, max_length=100, description="Numéro de rue")
     street_name: Optional[str] = Field(None, max_length=500, description="Nom de la rue")
@@ -29,10 +49,10 @@ class AddressBase(BaseModel):
         return v
 
 class UserCreate(AddressBase):
-    email: EmailStr = Field(..., description="Adresse email")
+    email: FastEmail = Field(..., description="Adresse email")
     password: str = Field(..., min_length=8, max_length=255, description="Mot de passe")
-    first_name: str = Field(..., max_length=100, description="Prénom")
-    last_name: str = Field(..., max_length=100, description="Nom de famille")
+    first_name: NonEmptyStr100 = Field(..., description="Prénom")
+    last_name: NonEmptyStr100 = Field(..., description="Nom de famille")
     phone: str = Field(..., max_length=50, description="Numéro de téléphone")
     
     @field_validator('password')
@@ -70,44 +90,21 @@ class UserCreate(AddressBase):
         if not re.match(r'^[0-9+\-\s\(\)]{10,20}$', v):
             raise ValueError('Format de téléphone invalide')
         return v
-    
-    @field_validator('first_name', 'last_name')
-    @classmethod
-    def validate_names(cls, v):
-        if not v.strip():
-            raise ValueError('Ce champ ne peut pas être vide')
-        return v.strip()
 
 class UserOut(AddressBase):
     id: int
-    email: EmailStr
+    email: FastEmail
     first_name: str
     last_name: str
     phone: str
 
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True, frozen=True, validate_assignment=False, extra='ignore')
 
 class BuildingBase(AddressBase):
-    name: str = Field(..., max_length=255, description="Nom de l'immeuble")
+    name: NonEmptyStr255 = Field(..., description="Nom de l'immeuble")
     floors: int = Field(..., ge=1, le=200, description="Nombre d'étages")
     is_copro: bool = Field(default=False, description="Est-ce une copropriété")
     copro_id: Optional[int] = Field(None, description="ID de la copropriété")
-    
-    @field_validator('name')
-    @classmethod
-    def validate_name(cls, v):
-        if not v.strip():
-            raise ValueError('Le nom de l\'immeuble ne peut pas être vide')
-        return v.strip()
-    
-    @field_validator('floors')
-    @classmethod
-    def validate_floors(cls, v):
-        if v < 1:
-            raise ValueError('Le nombre d\'étages doit être supérieur à 0')
-        if v > 200:
-            raise ValueError('Le nombre d\'étages ne peut pas dépasser 200')
-        return v
 
 class BuildingCreate(BuildingBase):
     pass
@@ -115,29 +112,12 @@ class BuildingCreate(BuildingBase):
 class BuildingOut(BuildingBase):
     id: int
     copro: Optional['CoproOut'] = None
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True, frozen=True, validate_assignment=False, extra='ignore')
 
 class ApartmentBase(BaseModel):
-    type_logement: str = Field(..., max_length=50, description="Type de logement")
-    layout: str = Field(..., max_length=50, description="Agencement")
+    type_logement: NonEmptyStr50 = Field(..., description="Type de logement")
+    layout: NonEmptyStr50 = Field(..., description="Agencement")
     floor: Optional[int] = Field(None, ge=-5, le=200, description="Étage")
-    
-    @field_validator('type_logement', 'layout')
-    @classmethod
-    def validate_required_fields(cls, v):
-        if not v.strip():
-            raise ValueError('Ce champ ne peut pas être vide')
-        return v.strip()
-    
-    @field_validator('floor')
-    @classmethod
-    def validate_floor(cls, v):
-        if v is not None:
-            if v < -5:
-                raise ValueError('L\'étage ne peut pas être inférieur à -5')
-            if v > 200:
-                raise ValueError('L\'étage ne peut pas dépasser 200')
-        return v
 
 class ApartmentCreate(ApartmentBase):
     building_id: int
@@ -146,7 +126,7 @@ class ApartmentOut(ApartmentBase):
     id: int
     building_id: int
 
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True, frozen=True, validate_assignment=False, extra='ignore')
 
 class ApartmentUserLinkOut(BaseModel):
     id: int
@@ -154,57 +134,57 @@ class ApartmentUserLinkOut(BaseModel):
     apartment_id: int
     role: UserRole
 
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True, frozen=True, validate_assignment=False, extra='ignore')
 
 class RoleAssignment(BaseModel):
     user_id: int
     role: UserRole
 
 class CoproBase(BaseModel):
-    nom: Optional[str] = None
-    adresse_rue: Optional[str] = None
-    adresse_code_postal: Optional[str] = None
-    adresse_ville: Optional[str] = None
-    annee_construction: Optional[int] = None
-    nb_batiments: Optional[int] = None
-    nb_lots_total: Optional[int] = None
-    nb_lots_principaux: Optional[int] = None
-    nb_lots_secondaires: Optional[int] = None
-    surface_totale_m2: Optional[int] = None
-    type_construction: Optional[str] = None
-    nb_etages: Optional[int] = None
-    ascenseur: Optional[bool] = None
-    nb_ascenseurs: Optional[int] = None
-    chauffage_collectif_type: Optional[str] = None
-    chauffage_individuel_type: Optional[str] = None
-    clim_centralisee: Optional[bool] = None
-    eau_chaude_collective: Optional[bool] = None
-    isolation_thermique: Optional[str] = None
-    isolation_annee: Optional[int] = None
-    rt2012_re2020: Optional[bool] = None
-    accessibilite_pmr: Optional[bool] = None
-    toiture_type: Optional[str] = None
-    toiture_materiaux: Optional[str] = None
-    gardien: Optional[bool] = None
-    local_velos: Optional[bool] = None
-    parkings_ext: Optional[bool] = None
-    nb_parkings_ext: Optional[int] = None
-    parkings_int: Optional[bool] = None
-    nb_parkings_int: Optional[int] = None
-    caves: Optional[bool] = None
-    nb_caves: Optional[int] = None
-    espaces_verts: Optional[bool] = None
-    jardins_partages: Optional[bool] = None
-    piscine: Optional[bool] = None
-    salle_sport: Optional[bool] = None
-    aire_jeux: Optional[bool] = None
-    salle_reunion: Optional[bool] = None
-    dpe_collectif: Optional[str] = None
-    audit_energetique: Optional[bool] = None
-    audit_energetique_date: Optional[str] = None
-    energie_utilisee: Optional[str] = None
-    panneaux_solaires: Optional[bool] = None
-    bornes_recharge: Optional[bool] = None
+    nom: OptStr = None
+    adresse_rue: OptStr = None
+    adresse_code_postal: OptStr = None
+    adresse_ville: OptStr = None
+    annee_construction: OptInt = None
+    nb_batiments: OptInt = None
+    nb_lots_total: OptInt = None
+    nb_lots_principaux: OptInt = None
+    nb_lots_secondaires: OptInt = None
+    surface_totale_m2: OptInt = None
+    type_construction: OptStr = None
+    nb_etages: OptInt = None
+    ascenseur: OptBool = None
+    nb_ascenseurs: OptInt = None
+    chauffage_collectif_type: OptStr = None
+    chauffage_individuel_type: OptStr = None
+    clim_centralisee: OptBool = None
+    eau_chaude_collective: OptBool = None
+    isolation_thermique: OptStr = None
+    isolation_annee: OptInt = None
+    rt2012_re2020: OptBool = None
+    accessibilite_pmr: OptBool = None
+    toiture_type: OptStr = None
+    toiture_materiaux: OptStr = None
+    gardien: OptBool = None
+    local_velos: OptBool = None
+    parkings_ext: OptBool = None
+    nb_parkings_ext: OptInt = None
+    parkings_int: OptBool = None
+    nb_parkings_int: OptInt = None
+    caves: OptBool = None
+    nb_caves: OptInt = None
+    espaces_verts: OptBool = None
+    jardins_partages: OptBool = None
+    piscine: OptBool = None
+    salle_sport: OptBool = None
+    aire_jeux: OptBool = None
+    salle_reunion: OptBool = None
+    dpe_collectif: OptStr = None
+    audit_energetique: OptBool = None
+    audit_energetique_date: OptStr = None
+    energie_utilisee: OptStr = None
+    panneaux_solaires: OptBool = None
+    bornes_recharge: OptBool = None
 
 class CoproCreate(CoproBase):
     pass
@@ -214,34 +194,34 @@ class CoproUpdate(CoproBase):
 
 class CoproOut(CoproBase):
     id: int
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True, frozen=True, validate_assignment=False, extra='ignore')
 
 class SyndicatCoproBase(BaseModel):
     copro_id: int
-    statut_juridique: Optional[str] = None
-    date_creation: Optional[str] = None
-    reglement_copro: Optional[bool] = None
-    carnet_entretien: Optional[bool] = None
-    nom_syndic: Optional[str] = None
-    type_syndic: Optional[str] = None
-    societe_syndic: Optional[str] = None
-    date_derniere_ag: Optional[str] = None
-    assurance_compagnie: Optional[str] = None
-    assurance_num_police: Optional[str] = None
-    assurance_validite: Optional[str] = None
-    procedures_judiciaires: Optional[bool] = None
-    procedures_details: Optional[str] = None
-    budget_annuel_previsionnel: Optional[int] = None
-    charges_annuelles_par_lot: Optional[int] = None
-    charges_speciales: Optional[int] = None
-    emprunt_collectif: Optional[bool] = None
-    emprunt_montant: Optional[int] = None
-    emprunt_echeance: Optional[str] = None
-    taux_impayes_charges: Optional[int] = None
-    fonds_roulement: Optional[int] = None
-    fonds_travaux: Optional[int] = None
-    travaux_votes: Optional[str] = None
-    travaux_en_cours: Optional[str] = None
+    statut_juridique: OptStr = None
+    date_creation: OptStr = None
+    reglement_copro: OptBool = None
+    carnet_entretien: OptBool = None
+    nom_syndic: OptStr = None
+    type_syndic: OptStr = None
+    societe_syndic: OptStr = None
+    date_derniere_ag: OptStr = None
+    assurance_compagnie: OptStr = None
+    assurance_num_police: OptStr = None
+    assurance_validite: OptStr = None
+    procedures_judiciaires: OptBool = None
+    procedures_details: OptStr = None
+    budget_annuel_previsionnel: OptInt = None
+    charges_annuelles_par_lot: OptInt = None
+    charges_speciales: OptInt = None
+    emprunt_collectif: OptBool = None
+    emprunt_montant: OptInt = None
+    emprunt_echeance: OptStr = None
+    taux_impayes_charges: OptInt = None
+    fonds_roulement: OptInt = None
+    fonds_travaux: OptInt = None
+    travaux_votes: OptStr = None
+    travaux_en_cours: OptStr = None
 
 class SyndicatCoproCreate(SyndicatCoproBase):
     pass
@@ -251,32 +231,25 @@ class SyndicatCoproUpdate(SyndicatCoproBase):
 
 class SyndicatCoproOut(SyndicatCoproBase):
     id: int
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True, frozen=True, validate_assignment=False, extra='ignore')
 
 class ApartmentUserFullOut(BaseModel):
     user_id: int
     first_name: str
     last_name: str
-    email: EmailStr
+    email: FastEmail
     role: UserRole
 
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True, frozen=True, validate_assignment=False, extra='ignore')
 
 # ---------------------- ROOM SCHEMAS ----------------------
 
 class RoomBase(BaseModel):
-    name: str = Field(..., min_length=1, max_length=100, description="Nom de la pièce")
+    name: NonEmptyStr100 = Field(..., description="Nom de la pièce")
     room_type: RoomType = Field(..., description="Type de pièce")
     area_m2: Optional[Decimal] = Field(None, ge=0, description="Surface en m²")
     description: Optional[str] = Field(None, max_length=1000, description="Description de la pièce")
     floor_level: int = Field(0, ge=-5, le=50, description="Étage dans l'appartement")
-    
-    @field_validator('name')
-    @classmethod
-    def validate_name(cls, v):
-        if not v.strip():
-            raise ValueError('Le nom de la pièce ne peut pas être vide')
-        return v.strip()
 
 class RoomCreate(RoomBase):
     apartment_id: int = Field(..., description="ID de l'appartement")
@@ -296,10 +269,10 @@ class RoomOut(RoomBase):
     created_at: datetime
     updated_at: datetime
     
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True, frozen=True, validate_assignment=False, extra='ignore')
 
 class RoomWithPhotos(RoomOut):
-    photos: List['PhotoOut'] = []
+    photos: List['PhotoOut'] = Field(default_factory=list)
     
     model_config = {"from_attributes": True}
 
@@ -355,7 +328,7 @@ class PhotoOut(BaseModel):
     apartment_id: Optional[int] = None
     room_id: Optional[int] = None
 
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True, frozen=True, validate_assignment=False, extra='ignore')
 
 class PhotoBatch(BaseModel):
     photos: List[PhotoOut]
@@ -383,7 +356,7 @@ class AuditLogOut(BaseModel):
     user_email: Optional[str] = None
     user_name: Optional[str] = None
 
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True, frozen=True, validate_assignment=False, extra='ignore')
 
 class AuditLogFilter(BaseModel):
     user_id: Optional[int] = None
@@ -396,6 +369,8 @@ class AuditLogFilter(BaseModel):
     limit: Optional[int] = 100
     offset: Optional[int] = 0
 
+    model_config = ConfigDict(defer_build=True)
+
 # ---------------------- SUBSCRIPTION SCHEMAS ----------------------
 
 class UserSubscriptionOut(BaseModel):
@@ -414,7 +389,7 @@ class UserSubscriptionOut(BaseModel):
     cancelled_at: Optional[datetime] = None
     apartment_limit: int
     
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True, frozen=True, validate_assignment=False, extra='ignore')
 
 class SubscriptionUpgradeRequest(BaseModel):
     subscription_type: SubscriptionType = Field(..., description="Type d'abonnement souhaité")
@@ -442,7 +417,7 @@ class PaymentOut(BaseModel):
     updated_at: datetime
     paid_at: Optional[datetime] = None
     
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True, frozen=True, validate_assignment=False, extra='ignore')
 
 class PaymentHistoryFilter(BaseModel):
     status: Optional[PaymentStatus] = None
@@ -451,6 +426,8 @@ class PaymentHistoryFilter(BaseModel):
     limit: Optional[int] = 50
     offset: Optional[int] = 0
 
+    model_config = ConfigDict(defer_build=True)
+
 class SubscriptionStats(BaseModel):
     total_users: int
     free_users: int
@@ -458,7 +435,9 @@ class SubscriptionStats(BaseModel):
     active_subscriptions: int
     cancelled_subscriptions: int
     monthly_revenue: Decimal
-    
+
+    model_config = ConfigDict(defer_build=True)
+
 class ApartmentLimitCheck(BaseModel):
     current_count: int
     limit: int
@@ -466,53 +445,46 @@ class ApartmentLimitCheck(BaseModel):
     subscription_type: SubscriptionType
     needs_upgrade: bool
 
+    model_config = ConfigDict(defer_build=True)
+
 # ---------------------- FLOOR PLAN SCHEMAS ----------------------
 
-class FloorPlanType(str, Enum):
-    room = "room"
-    apartment = "apartment"
+class Point(BaseModel):
+    x: float
+    y: float
+
+    model_config = ConfigDict(frozen=True)
+
+class WallPosition(Point):
+    t: float = Field(0, description="Position relative sur le mur")
 
 class FloorPlanElement(BaseModel):
     id: str = Field(..., description="ID unique de l'élément")
     type: str = Field(..., description="Type d'élément (wall, door, window)")
-    startPoint: Optional[dict] = Field(None, description="Point de départ pour les murs")
-    endPoint: Optional[dict] = Field(None, description="Point de fin pour les murs")
+    startPoint: Optional[Point] = Field(None, description="Point de départ pour les murs")
+    endPoint: Optional[Point] = Field(None, description="Point de fin pour les murs")
     wallId: Optional[str] = Field(None, description="ID du mur parent pour portes/fenêtres")
-    position: Optional[dict] = Field(None, description="Position sur le mur")
+    position: Optional[WallPosition] = Field(None, description="Position sur le mur")
     width: Optional[int] = Field(None, description="Largeur de l'élément")
     thickness: Optional[int] = Field(None, description="Épaisseur pour les murs")
-    properties: Optional[dict] = Field(default={}, description="Propriétés spécifiques")
+    properties: Dict[str, Optional[Union[int, float, str, bool]]] = Field(default_factory=dict, description="Propriétés spécifiques")
 
 class FloorPlanCreate(BaseModel):
-    name: str = Field(..., min_length=1, max_length=255, description="Nom du plan")
+    name: NonEmptyStr255 = Field(..., description="Nom du plan")
     type: FloorPlanType = Field(..., description="Type de plan")
     room_id: Optional[int] = Field(None, description="ID de la pièce associée")
     apartment_id: Optional[int] = Field(None, description="ID de l'appartement associé")
     xml_data: Optional[str] = Field(None, description="Données XML du plan")
     scale: float = Field(1.0, ge=0.1, le=10.0, description="Échelle du plan")
     grid_size: int = Field(20, ge=5, le=100, description="Taille de la grille")
-    elements: Optional[List[FloorPlanElement]] = Field(default=[], description="Éléments du plan")
-    
-    @field_validator('name')
-    @classmethod
-    def validate_name(cls, v):
-        if not v.strip():
-            raise ValueError('Le nom du plan ne peut pas être vide')
-        return v.strip()
+    elements: Optional[List[FloorPlanElement]] = Field(default_factory=list, description="Éléments du plan")
 
 class FloorPlanUpdate(BaseModel):
-    name: Optional[str] = Field(None, min_length=1, max_length=255)
+    name: Optional[NonEmptyStr255] = None
     xml_data: Optional[str] = None
     scale: Optional[float] = Field(None, ge=0.1, le=10.0)
     grid_size: Optional[int] = Field(None, ge=5, le=100)
     elements: Optional[List[FloorPlanElement]] = None
-    
-    @field_validator('name')
-    @classmethod
-    def validate_name(cls, v):
-        if v is not None and not v.strip():
-            raise ValueError('Le nom du plan ne peut pas être vide')
-        return v.strip() if v else v
 
 class FloorPlanOut(BaseModel):
     id: int
@@ -528,48 +500,26 @@ class FloorPlanOut(BaseModel):
     created_at: datetime
     updated_at: datetime
     
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True, frozen=True, validate_assignment=False, extra='ignore')
 
 class FloorPlanWithElements(FloorPlanOut):
-    elements: List[FloorPlanElement] = []
+    elements: List[FloorPlanElement] = Field(default_factory=list)
     metadata: Optional[dict] = None
 
 class FloorPlanTemplate(BaseModel):
     name: str
     elements: List[FloorPlanElement]
 
-# ---------------------- RENTAL MANAGEMENT SCHEMAS ----------------------
-
-class LeaseStatus(str, Enum):
-    ACTIVE = "ACTIVE"
-    EXPIRED = "EXPIRED"
-    TERMINATED = "TERMINATED"
-    PENDING = "PENDING"
-
-class DocumentType(str, Enum):
-    LEASE = "LEASE"
-    INVENTORY = "INVENTORY"
-    INSURANCE = "INSURANCE"
-    INCOME_PROOF = "INCOME_PROOF"
-    ID_DOCUMENT = "ID_DOCUMENT"
-    BANK_DETAILS = "BANK_DETAILS"
-    DEPOSIT_RECEIPT = "DEPOSIT_RECEIPT"
-    RENT_RECEIPT = "RENT_RECEIPT"
-    OTHER = "OTHER"
-
-class InventoryType(str, Enum):
-    ENTRY = "ENTRY"
-    EXIT = "EXIT"
-    PERIODIC = "PERIODIC"
+    model_config = ConfigDict(defer_build=True)
 
 # ---------------------- TENANT SCHEMAS ----------------------
 
 class TenantBase(BaseModel):
-    first_name: str = Field(..., min_length=1, max_length=100, description="Prénom")
-    last_name: str = Field(..., min_length=1, max_length=100, description="Nom de famille")
-    email: EmailStr = Field(..., description="Adresse email")
+    first_name: NonEmptyStr100 = Field(..., description="Prénom")
+    last_name: NonEmptyStr100 = Field(..., description="Nom de famille")
+    email: FastEmail = Field(..., description="Adresse email")
     phone: Optional[str] = Field(None, max_length=50, description="Numéro de téléphone")
-    date_of_birth: Optional[datetime] = Field(None, description="Date de naissance")
+    date_of_birth: Optional[date] = Field(None, description="Date de naissance")
     previous_address: Optional[str] = Field(None, max_length=1000, description="Adresse précédente")
     occupation: Optional[str] = Field(None, max_length=200, description="Profession")
     employer: Optional[str] = Field(None, max_length=200, description="Employeur")
@@ -578,13 +528,6 @@ class TenantBase(BaseModel):
     emergency_contact_phone: Optional[str] = Field(None, max_length=50, description="Contact d'urgence - Téléphone")
     emergency_contact_relation: Optional[str] = Field(None, max_length=100, description="Contact d'urgence - Relation")
     notes: Optional[str] = Field(None, max_length=2000, description="Notes")
-    
-    @field_validator('first_name', 'last_name')
-    @classmethod
-    def validate_names(cls, v):
-        if not v.strip():
-            raise ValueError('Ce champ ne peut pas être vide')
-        return v.strip()
 
 class TenantCreate(TenantBase):
     pass
@@ -592,9 +535,9 @@ class TenantCreate(TenantBase):
 class TenantUpdate(BaseModel):
     first_name: Optional[str] = Field(None, min_length=1, max_length=100)
     last_name: Optional[str] = Field(None, min_length=1, max_length=100)
-    email: Optional[EmailStr] = None
+    email: Optional[FastEmail] = None
     phone: Optional[str] = Field(None, max_length=50)
-    date_of_birth: Optional[datetime] = None
+    date_of_birth: Optional[date] = None
     previous_address: Optional[str] = Field(None, max_length=1000)
     occupation: Optional[str] = Field(None, max_length=200)
     employer: Optional[str] = Field(None, max_length=200)
@@ -609,7 +552,7 @@ class TenantOut(TenantBase):
     created_at: datetime
     updated_at: datetime
     
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True, frozen=True, validate_assignment=False, extra='ignore')
 
 # ---------------------- LEASE SCHEMAS ----------------------
 
@@ -660,7 +603,7 @@ class LeaseOut(LeaseBase):
     created_at: datetime
     updated_at: datetime
     
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True, frozen=True, validate_assignment=False, extra='ignore')
 
 class LeaseWithDetails(LeaseOut):
     tenant: TenantOut
@@ -672,17 +615,10 @@ class LeaseWithDetails(LeaseOut):
 
 class TenantDocumentBase(BaseModel):
     document_type: DocumentType = Field(..., description="Type de document")
-    title: str = Field(..., min_length=1, max_length=255, description="Titre du document")
+    title: NonEmptyStr255 = Field(..., description="Titre du document")
     description: Optional[str] = Field(None, max_length=1000, description="Description")
-    document_date: Optional[datetime] = Field(None, description="Date du document")
-    expiry_date: Optional[datetime] = Field(None, description="Date d'expiration")
-    
-    @field_validator('title')
-    @classmethod
-    def validate_title(cls, v):
-        if not v.strip():
-            raise ValueError('Le titre ne peut pas être vide')
-        return v.strip()
+    document_date: Optional[date] = Field(None, description="Date du document")
+    expiry_date: Optional[date] = Field(None, description="Date d'expiration")
 
 class TenantDocumentCreate(TenantDocumentBase):
     tenant_id: int = Field(..., description="ID du locataire")
@@ -691,8 +627,8 @@ class TenantDocumentCreate(TenantDocumentBase):
 class TenantDocumentUpdate(BaseModel):
     title: Optional[str] = Field(None, min_length=1, max_length=255)
     description: Optional[str] = Field(None, max_length=1000)
-    document_date: Optional[datetime] = None
-    expiry_date: Optional[datetime] = None
+    document_date: Optional[date] = None
+    expiry_date: Optional[date] = None
     is_verified: Optional[bool] = None
     verification_notes: Optional[str] = Field(None, max_length=1000)
 
@@ -710,14 +646,14 @@ class TenantDocumentOut(TenantDocumentBase):
     created_at: datetime
     updated_at: datetime
     
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True, frozen=True, validate_assignment=False, extra='ignore')
 
 # ---------------------- INVENTORY SCHEMAS ----------------------
 
 class InventoryRoomData(BaseModel):
     room_name: str = Field(..., description="Nom de la pièce")
     condition: str = Field(..., description="État de la pièce")
-    items: List[dict] = Field(default=[], description="Éléments de la pièce")
+    items: List[dict] = Field(default_factory=list, description="Éléments de la pièce")
     notes: Optional[str] = Field(None, description="Notes spécifiques")
 
 class InventoryBase(BaseModel):
@@ -733,7 +669,7 @@ class InventoryBase(BaseModel):
 
 class InventoryCreate(InventoryBase):
     lease_id: int = Field(..., description="ID du bail")
-    rooms_data: Optional[List[InventoryRoomData]] = Field(default=[], description="Données des pièces")
+    rooms_data: Optional[List[InventoryRoomData]] = Field(default_factory=list, description="Données des pièces")
 
 class InventoryUpdate(BaseModel):
     conducted_date: Optional[datetime] = None
@@ -762,7 +698,7 @@ class InventoryOut(InventoryBase):
     created_at: datetime
     updated_at: datetime
     
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True, frozen=True, validate_assignment=False, extra='ignore')
 
 # ---------------------- TENANT PORTAL SCHEMAS ----------------------
 
@@ -772,13 +708,15 @@ class TenantPortalInfo(BaseModel):
     current_lease: Optional[LeaseOut] = None
     apartment_info: Optional['ApartmentOut'] = None
     building_info: Optional['BuildingOut'] = None
-    documents: List[TenantDocumentOut] = []
-    inventories: List[InventoryOut] = []
+    documents: List[TenantDocumentOut] = Field(default_factory=list)
+    inventories: List[InventoryOut] = Field(default_factory=list)
 
 class TenantLoginRequest(BaseModel):
-    email: EmailStr = Field(..., description="Email du locataire")
+    email: FastEmail = Field(..., description="Email du locataire")
     lease_reference: Optional[str] = Field(None, description="Référence du bail (optionnel)")
 
+    model_config = ConfigDict(defer_build=True)
+
 # ---------------------- STATISTICS SCHEMAS ----------------------
 
 class RentalStats(BaseModel):
@@ -789,10 +727,19 @@ class RentalStats(BaseModel):
     total_monthly_revenue: Decimal
     occupancy_rate: float  # Pourcentage d'occupation
 
+    model_config = ConfigDict(defer_build=True)
+
 # ---------------------- STRIPE WEBHOOK SCHEMAS ----------------------
 
 class StripeWebhookEvent(BaseModel):
     id: str
     type: str
     data: dict
-    created: int
\ No newline at end of file
+    created: int
+
+    model_config = ConfigDict(defer_build=True)
+
+
+def parse_webhook(raw: bytes) -> StripeWebhookEvent:
+    """Valide un webhook Stripe depuis le corps brut (JSON parsé une seule fois par pydantic-core)"""
+    return StripeWebhookEvent.model_validate_json(raw)
@@ -2,10 +2,11 @@
 Schémas Pydantic pour l'administration
 Validation des données pour le panel administrateur
 """
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 from typing import List, Optional, Dict, Any, Union
 from datetime import datetime
 from enums import AdminRole, UserStatus, AccountAction, SubscriptionType, AuthType
+from validators import Email
 
 
 # === SCHÉMAS DE BASE ADMIN ===
@@ -53,8 +54,7 @@ class AdminUserOut(AdminUserBase):
     user_email: Optional[str] = None
     user_name: Optional[str] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 # === SCHÉMAS DASHBOARD ===
@@ -69,6 +69,8 @@ class DashboardStats(BaseModel):
     total_groups: int = Field(ge=0)
     new_users_today: int = Field(ge=0)
     new_users_week: int = Field(ge=0)
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class RecentSignup(BaseModel):
@@ -79,18 +81,24 @@ class RecentSignup(BaseModel):
     created_at: datetime
     auth_type: AuthType
     status: str
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class UserGrowthData(BaseModel):
     """Données de croissance utilisateur"""
     date: str
     count: int = Field(ge=0)
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class SubscriptionBreakdown(BaseModel):
     """Répartition des abonnements"""
     free: int = Field(ge=0)
     premium: int = Field(ge=0)
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class SystemAlert(BaseModel):
@@ -99,6 +107,8 @@ class SystemAlert(BaseModel):
     title: str = Field(max_length=200)
     message: str = Field(max_length=500)
     action_url: Optional[str] = Field(default=None, max_length=500)
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class AdminDashboardOut(BaseModel):
@@ -108,6 +118,8 @@ class AdminDashboardOut(BaseModel):
     user_growth: List[UserGrowthData]
     subscription_breakdown: SubscriptionBreakdown
     system_alerts: List[SystemAlert]
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 # === SCHÉMAS GESTION UTILISATEURS ===
@@ -118,6 +130,8 @@ class UserMultiproprietData(BaseModel):
     sponsored_apartments: int = Field(ge=0)
     accessible_apartments: int = Field(ge=0)
     can_sponsor: bool
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class UserListItem(BaseModel):
@@ -137,6 +151,8 @@ class UserListItem(BaseModel):
     multipropriete: UserMultiproprietData
     last_login: Optional[datetime] = None
     full_address: Optional[str] = None
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class UsersListPagination(BaseModel):
@@ -145,6 +161,9 @@ class UsersListPagination(BaseModel):
     page: int = Field(ge=1)
     per_page: int = Field(ge=1, le=100)
     pages: int = Field(ge=0)
+    next_cursor: Optional[str] = None  # Curseur keyset de la page suivante
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class UsersListFilters(BaseModel):
@@ -154,6 +173,8 @@ class UsersListFilters(BaseModel):
     subscription_filter: Optional[str] = None
     sort_by: str = Field(default="created_at")
     sort_order: str = Field(default="desc", pattern="^(asc|desc)$")
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class UsersListOut(BaseModel):
@@ -161,6 +182,39 @@ class UsersListOut(BaseModel):
     users: List[UserListItem]
     pagination: UsersListPagination
     filters: UsersListFilters
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
+
+
+class UsersListColumns(BaseModel):
+    """Liste utilisateurs en colonnes : une liste par champ, dans le même ordre"""
+    id: List[int]
+    email: List[str]
+    first_name: List[Optional[str]]
+    last_name: List[Optional[str]]
+    phone: List[Optional[str]]
+    created_at: List[datetime]
+    auth_type: List[AuthType]
+    email_verified: List[bool]
+    user_status: List[str]
+    subscription_type: List[SubscriptionType]
+    subscription_status: List[str]
+    apartment_count: List[int]
+    personal_apartments: List[int]
+    sponsored_apartments: List[int]
+    accessible_apartments: List[int]
+    can_sponsor: List[bool]
+    last_login: List[Optional[datetime]]
+    full_address: List[Optional[str]]
+
+
+class UsersListColumnarOut(BaseModel):
+    """Liste paginée d'utilisateurs au format colonnes"""
+    columns: UsersListColumns
+    pagination: UsersListPagination
+    filters: UsersListFilters
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class UsersListQuery(BaseModel):
@@ -172,6 +226,7 @@ class UsersListQuery(BaseModel):
     subscription_filter: Optional[SubscriptionType] = None
     sort_by: str = Field(default="created_at")
     sort_order: str = Field(default="desc", pattern="^(asc|desc)$")
+    cursor: Optional[str] = Field(default=None, max_length=64)
 
 
 # === SCHÉMAS DÉTAILS UTILISATEUR ===
@@ -184,6 +239,8 @@ class UserAddress(BaseModel):
     postal_code: Optional[str] = None
     city: Optional[str] = None
     country: Optional[str] = None
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class UserDetailedData(BaseModel):
@@ -202,6 +259,8 @@ class UserDetailedData(BaseModel):
     suspension_reason: Optional[str] = None
     suspension_expires_at: Optional[datetime] = None
     address: UserAddress
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class UserApartmentInfo(BaseModel):
@@ -213,6 +272,8 @@ class UserApartmentInfo(BaseModel):
     floor: Optional[int] = None
     is_in_group: bool
     group_name: Optional[str] = None
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class UserPropertiesData(BaseModel):
@@ -220,6 +281,8 @@ class UserPropertiesData(BaseModel):
     apartments: List[UserApartmentInfo]
     multipropriete: UserMultiproprietData
     subscription: Dict[str, Any]
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class AdminActionInfo(BaseModel):
@@ -230,6 +293,8 @@ class AdminActionInfo(BaseModel):
     reason: Optional[str] = None
     created_at: datetime
     admin_email: Optional[str] = None
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class StatusHistoryInfo(BaseModel):
@@ -242,6 +307,8 @@ class StatusHistoryInfo(BaseModel):
     changed_by: Optional[str] = None
     expires_at: Optional[datetime] = None
     is_temporary: bool
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class UserActivityData(BaseModel):
@@ -250,6 +317,8 @@ class UserActivityData(BaseModel):
     status_history: List[StatusHistoryInfo]
     login_history: List[Dict[str, Any]] = []  # À implémenter
     recent_activity: List[Dict[str, Any]] = []  # À implémenter
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class UserDetailedOut(BaseModel):
@@ -257,6 +326,8 @@ class UserDetailedOut(BaseModel):
     user_data: UserDetailedData
     properties_data: UserPropertiesData
     activity_data: UserActivityData
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 # === SCHÉMAS ACTIONS ADMINISTRATIVES ===
@@ -267,23 +338,15 @@ class UserActionRequest(BaseModel):
     reason: Optional[str] = Field(default=None, max_length=500)
     duration_days: Optional[int] = Field(default=None, ge=1, le=365)
     
-    @validator('reason')
-    def reason_required_for_some_actions(cls, v, values):
-        """Certaines actions nécessitent une raison"""
-        if 'action' in values:
-            action = values['action']
-            if action in [AccountAction.SUSPEND, AccountAction.BAN, AccountAction.DEACTIVATE]:
-                if not v or not v.strip():
-                    raise ValueError(f'Une raison est requise pour l\'action {action}')
-        return v
-    
-    @validator('duration_days')
-    def duration_for_suspend_only(cls, v, values):
-        """Durée uniquement pour les suspensions"""
-        if 'action' in values and v is not None:
-            if values['action'] != AccountAction.SUSPEND:
-                raise ValueError('La durée n\'est applicable que pour les suspensions')
-        return v
+    @model_validator(mode='after')
+    def _check_action_constraints(self):
+        """Raison requise pour certaines actions, durée uniquement pour les suspensions"""
+        if self.action in (AccountAction.SUSPEND, AccountAction.BAN, AccountAction.DEACTIVATE):
+            if not (self.reason and self.reason.strip()):
+                raise ValueError(f'Une raison est requise pour l\'action {self.action}')
+        if self.duration_days is not None and self.action != AccountAction.SUSPEND:
+            raise ValueError('La durée n\'est applicable que pour les suspensions')
+        return self
 
 
 class UserActionResponse(BaseModel):
@@ -293,6 +356,8 @@ class UserActionResponse(BaseModel):
     user_id: int
     action: AccountAction
     executed_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 # === SCHÉMAS NOTIFICATIONS ADMIN ===
@@ -322,8 +387,7 @@ class AdminNotificationOut(AdminNotificationBase):
     is_expired: bool
     is_urgent: bool
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 # === SCHÉMAS PARAMÈTRES SYSTÈME ===
@@ -358,15 +422,14 @@ class SystemSettingOut(SystemSettingBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 # === SCHÉMAS D'AUTHENTIFICATION ADMIN ===
 
 class AdminLoginRequest(BaseModel):
     """Requête de connexion admin"""
-    email: EmailStr
+    email: Email
     password: str = Field(min_length=8)
     remember_me: bool = Field(default=False)
 
@@ -378,6 +441,8 @@ class AdminLoginResponse(BaseModel):
     expires_in: int
     admin_user: AdminUserOut
     permissions: Dict[str, bool]
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 # === SCHÉMAS DE RECHERCHE ET STATISTIQUES ===
@@ -397,6 +462,8 @@ class SearchResult(BaseModel):
     description: Optional[str] = None
     url: Optional[str] = None
     relevance_score: float = Field(ge=0, le=1)
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class SearchResults(BaseModel):
@@ -405,6 +472,8 @@ class SearchResults(BaseModel):
     results: List[SearchResult]
     total_found: int
     search_time_ms: float
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class AdminStatsQuery(BaseModel):
@@ -420,10 +489,45 @@ class MetricDataPoint(BaseModel):
     timestamp: datetime
     value: Union[int, float]
     label: Optional[str] = None
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class AdminStatsOut(BaseModel):
     """Statistiques admin sortie"""
     query: AdminStatsQuery
     metrics: Dict[str, List[MetricDataPoint]]
-    generated_at: datetime
\ No newline at end of file
+    generated_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
+
+
+# === CONSTRUCTION SANS VALIDATION (données issues de la base) ===
+
+def users_list_from_trusted(data: Dict[str, Any]) -> UsersListOut:
+    """Construit un UsersListOut à partir du résultat de AdminService.get_users_list"""
+    users = [
+        UserListItem.model_construct(
+            _fields_set=set(row),
+            **{**row, "multipropriete": UserMultiproprietData.model_construct(**row["multipropriete"])}
+        )
+        for row in data["users"]
+    ]
+    return UsersListOut.model_construct(
+        users=users,
+        pagination=UsersListPagination.model_construct(**data["pagination"]),
+        filters=UsersListFilters.model_construct(**data["filters"])
+    )
+
+
+def users_list_columns(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Transpose le résultat de AdminService.get_users_list au format UsersListColumnarOut"""
+    rows = data["users"]
+    columns = {
+        name: [row[name] for row in rows]
+        for name in UsersListColumns.model_fields
+        if name not in UserMultiproprietData.model_fields
+    }
+    for name in UserMultiproprietData.model_fields:
+        columns[name] = [row["multipropriete"][name] for row in rows]
+    return {"columns": columns, "pagination": data["pagination"], "filters": data["filters"]}
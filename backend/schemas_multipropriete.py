@@ -2,13 +2,13 @@
 Schémas Pydantic pour le système de multipropriété
 Validation et sérialisation des données d'API
 """
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
 
 from models_multipropriete import PropertyGroupType, PropertyGroupStatus, MembershipStatus
-from validators import CommonValidators
+from validators import CommonValidators, Email
 
 
 # ==================== ENUMS POUR API ====================
@@ -83,7 +83,7 @@ class PropertyGroupMemberUpdate(PropertyGroupMemberBase):
 
 class GroupInvitationCreate(BaseModel):
     """Schéma pour créer une invitation"""
-    invited_user_email: EmailStr = Field(..., description="Email de l'utilisateur à inviter")
+    invited_user_email: Email = Field(..., description="Email de l'utilisateur à inviter")
     invitation_message: Optional[str] = Field(None, max_length=500, description="Message personnalisé")
     expires_in_days: int = Field(default=7, ge=1, le=30, description="Expiration en jours")
     
@@ -96,7 +96,7 @@ class GroupInvitationCreate(BaseModel):
 
 class GroupInvitationResponse(BaseModel):
     """Schéma pour répondre à une invitation"""
-    invitation_code: str = Field(..., min_length=8, max_length=8, description="Code d'invitation")
+    invitation_code: str = Field(..., min_length=8, max_length=12, description="Code d'invitation")
     accept: bool = Field(..., description="Accepter (True) ou refuser (False)")
 
 
@@ -109,8 +109,7 @@ class UserSummary(BaseModel):
     first_name: Optional[str]
     last_name: Optional[str]
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class PropertyGroupOut(BaseModel):
@@ -132,8 +131,7 @@ class PropertyGroupOut(BaseModel):
     active_members_count: int
     apartments_count: int
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class PropertyGroupMemberOut(BaseModel):
@@ -153,8 +151,7 @@ class PropertyGroupMemberOut(BaseModel):
     invited_by: Optional[UserSummary]
     invitation_message: Optional[str]
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class PropertyGroupInvitationOut(BaseModel):
@@ -176,8 +173,7 @@ class PropertyGroupInvitationOut(BaseModel):
     is_expired: bool
     is_pending: bool
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 # ==================== SCHÉMAS DE TABLEAU DE BORD ====================
@@ -189,6 +185,8 @@ class QuotaInfo(BaseModel):
     remaining: int  # -1 pour illimité
     is_unlimited: bool
     can_add_more: bool
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class MultiproprieteDashboardOut(BaseModel):
@@ -211,6 +209,8 @@ class MultiproprieteDashboardOut(BaseModel):
     # Invitations en attente
     pending_invitations_received: int
     pending_invitations_sent: int
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class ApartmentAccessInfo(BaseModel):
@@ -228,6 +228,8 @@ class ApartmentAccessInfo(BaseModel):
     can_delete: bool
     can_invite_tenants: bool
     can_manage_finances: bool
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 class UserApartmentsAccessOut(BaseModel):
@@ -237,6 +239,8 @@ class UserApartmentsAccessOut(BaseModel):
     personal_count: int
     sponsored_count: int
     member_count: int
+    
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 
 # ==================== SCHÉMAS D'ACTIONS ====================
@@ -354,4 +358,4 @@ class GroupNotification(BaseModel):
     
     # Actions possibles
     action_url: Optional[str]
-    action_label: Optional[str]
\ No newline at end of file
+    action_label: Optional[str]
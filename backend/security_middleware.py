@@ -2,34 +2,232 @@
 Middleware de sécurité avancé pour LocAppart
 """
 import time
+import atexit
 import hashlib
 import hmac
+import ipaddress
+import logging
 import os
-from typing import Set
+import queue
+import re
+from logging.handlers import QueueHandler, QueueListener
+from typing import Iterable, Set
 from fastapi import Request, HTTPException
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
 
+# Moteur multi-patterns Hyperscan (optionnel)
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+# Recherche de sous-chaînes Aho-Corasick (optionnel)
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Trie radix pour la blacklist IP/CIDR (optionnel)
+try:
+    import pytricia
+    PYTRICIA_AVAILABLE = True
+except ImportError:
+    PYTRICIA_AVAILABLE = False
+
+# Client Redis asynchrone pour la blacklist et le rate limit partagés entre workers (optionnel)
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import RedisError
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# Journalisation sécurité : les requêtes ne font qu'empiler l'enregistrement,
+# l'écriture sur la sortie est faite par le thread du QueueListener
+logger = logging.getLogger("security")
+if not logger.handlers:
+    _log_queue = queue.Queue(-1)
+    _log_listener = QueueListener(_log_queue, logging.StreamHandler(), respect_handler_level=True)
+    logger.addHandler(QueueHandler(_log_queue))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
+# Patterns d'attaques communes, source unique des deux moteurs (Hyperscan, ou
+# Aho-Corasick/sous-chaînes + regex) : sous-chaînes littérales, et regex à joker
+# précédées du mot-clé qui doit apparaître pour qu'elles puissent correspondre
+SUSPICIOUS_LITERALS = ("<script", "javascript:", "eval(", "../", "cmd=", "exec(", "system(")
+SUSPICIOUS_WILDCARDS = (("union", r"union.*select"), ("drop", r"drop.*table"))
+
+# Outils de scan reconnus dans le User-Agent
+SUSPICIOUS_AGENTS = ("sqlmap", "nmap", "nikto", "dirb", "gobuster", "curl/7")
+
+# Seuil de requête lente (5 secondes), en nanosecondes
+SLOW_REQUEST_NS = 5_000_000_000
+
+# Rate limit global par IP (fenêtre d'une minute) et blacklist temporaire
+RATE_LIMIT_PER_MINUTE = 300
+SUSPICIOUS_ATTEMPTS_BEFORE_BLOCK = 3
+TEMP_BLOCK_SECONDS = 3600
+# Durée pendant laquelle un refus est gardé en mémoire locale sans interroger Redis
+LOCAL_DENY_TTL_SECONDS = 10
+LOCAL_DENY_MAX_ENTRIES = 10000
+
+# Headers de sécurité ajoutés à chaque réponse, pré-encodés (noms en minuscules)
+SECURITY_HEADERS_RAW = (
+    (b"strict-transport-security", b"max-age=31536000; includeSubDomains"),
+    (b"x-download-options", b"noopen"),
+    (b"x-permitted-cross-domain-policies", b"none"),
+    # Header personnalisé pour identifier l'application
+    (b"x-powered-by", b"LocAppart-Secure"),
+)
+
 class SecurityMiddleware(BaseHTTPMiddleware):
     """Middleware de sécurité avancé"""
     
-    def __init__(self, app, allowed_hosts: Set[str] = None):
+    def __init__(self, app, allowed_hosts: Set[str] = None, blocked_networks: Iterable[str] = None):
         super().__init__(app)
-        self.allowed_hosts = allowed_hosts or {"localhost", "127.0.0.1"}
-        self.blocked_ips: Set[str] = set()
-        self.suspicious_patterns = [
-            # Patterns d'attaques communes
-            r'<script',
-            r'javascript:',
-            r'eval\(',
-            r'union.*select',
-            r'drop.*table',
-            r'../../../',
-            r'\.\./',
-            r'cmd=',
-            r'exec\(',
-            r'system\(',
+        # En minuscules, comme l'hôte de la requête comparé dans _check_host
+        self.allowed_hosts = frozenset(
+            host.lower() for host in allowed_hosts or {"localhost", "127.0.0.1"}
+        )
+        # Blacklist IP/CIDR : un trie par famille d'adresses si pytricia est installé,
+        # sinon une liste de réseaux ipaddress
+        self._blocked_tries = (
+            {4: pytricia.PyTricia(32), 6: pytricia.PyTricia(128)} if PYTRICIA_AVAILABLE else None
+        )
+        self._blocked_networks = []
+        for network in blocked_networks or ():
+            self.block(network)
+        # Blacklist / rate limit partagés via Redis si REDIS_URL est configuré
+        redis_url = os.getenv("REDIS_URL")
+        self._redis = aioredis.from_url(redis_url) if REDIS_AVAILABLE and redis_url else None
+        # Cache local des refus : ip -> (expiration monotonic, status HTTP)
+        self._denied_cache = {}
+        self.suspicious_patterns = [re.escape(literal) for literal in SUSPICIOUS_LITERALS] + [
+            regex for _, regex in SUSPICIOUS_WILDCARDS
         ]
+        # Base Hyperscan (DFA unique pour tous les patterns) si disponible
+        self._hs_db = self._build_hyperscan_db() if HYPERSCAN_AVAILABLE else None
+        # Sinon, patterns littéraux (automate Aho-Corasick ou recherche de sous-chaînes)
+        # + regex résiduelle pour les jokers, précédée de ses mots-clés d'ancrage
+        self._literal_patterns = SUSPICIOUS_LITERALS
+        self._wildcard_anchors = tuple(anchor for anchor, _ in SUSPICIOUS_WILDCARDS)
+        self._wildcard_re = re.compile("|".join(regex for _, regex in SUSPICIOUS_WILDCARDS))
+        self._automaton = (
+            self._build_automaton() if AHOCORASICK_AVAILABLE and self._hs_db is None else None
+        )
+    
+    def _build_automaton(self):
+        """Construit l'automate Aho-Corasick des patterns littéraux"""
+        automaton = ahocorasick.Automaton()
+        for literal in self._literal_patterns:
+            automaton.add_word(literal, literal)
+        automaton.make_automaton()
+        return automaton
+    
+    def _build_hyperscan_db(self):
+        """Compile les patterns suspects dans une base Hyperscan"""
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[pattern.encode() for pattern in self.suspicious_patterns],
+            ids=list(range(len(self.suspicious_patterns))),
+            flags=[hyperscan.HS_FLAG_CASELESS] * len(self.suspicious_patterns),
+        )
+        return db
+    
+    def block(self, network: str):
+        """Ajoute une IP ou une plage CIDR à la blacklist"""
+        parsed = ipaddress.ip_network(network.strip(), strict=False)
+        if self._blocked_tries is not None:
+            self._blocked_tries[parsed.version].insert(str(parsed), True)
+        else:
+            self._blocked_networks.append(parsed)
+    
+    def _is_blocked(self, client_ip: str) -> bool:
+        """Vérifie si l'IP appartient à une plage blacklistée"""
+        if self._blocked_tries is not None:
+            trie = self._blocked_tries[6 if ":" in client_ip else 4]
+            if not len(trie):
+                return False
+            try:
+                return client_ip in trie
+            except (KeyError, ValueError):
+                return False  # IP invalide ou "unknown"
+        if not self._blocked_networks:
+            return False
+        try:
+            address = ipaddress.ip_address(client_ip)
+        except ValueError:
+            return False
+        return any(address in network for network in self._blocked_networks)
+    
+    async def _check_shared_limits(self, client_ip: str):
+        """Vérifie blacklist et rate limit Redis ; renvoie le status HTTP de refus ou None"""
+        now = time.monotonic()
+        cached = self._denied_cache.get(client_ip)
+        if cached is not None:
+            if cached[0] > now:
+                return cached[1]
+            del self._denied_cache[client_ip]
+        
+        rate_key = f"rate:{client_ip}"
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.get(f"blocked:{client_ip}")
+                pipe.incr(rate_key)
+                pipe.pexpire(rate_key, 60000, nx=True)
+                blocked, count, _ = await pipe.execute()
+        except RedisError:
+            return None  # Redis indisponible : ne pas bloquer le trafic
+        
+        if blocked is not None:
+            denied = 403
+        elif count > RATE_LIMIT_PER_MINUTE:
+            denied = 429
+        else:
+            return None
+        
+        if len(self._denied_cache) >= LOCAL_DENY_MAX_ENTRIES:
+            self._denied_cache = {
+                ip: entry for ip, entry in self._denied_cache.items() if entry[0] > now
+            }
+        if len(self._denied_cache) < LOCAL_DENY_MAX_ENTRIES:
+            self._denied_cache[client_ip] = (now + LOCAL_DENY_TTL_SECONDS, denied)
+        return denied
+    
+    async def _record_suspicious(self, client_ip: str):
+        """Blacklist temporairement une IP après plusieurs requêtes suspectes"""
+        attempts_key = f"suspicious:{client_ip}"
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.incr(attempts_key)
+                pipe.expire(attempts_key, TEMP_BLOCK_SECONDS, nx=True)
+                attempts, _ = await pipe.execute()
+            if attempts >= SUSPICIOUS_ATTEMPTS_BEFORE_BLOCK:
+                await self._redis.set(f"blocked:{client_ip}", 1, ex=TEMP_BLOCK_SECONDS)
+        except RedisError:
+            pass
+    
+    def _hyperscan_match(self, data: bytes) -> bool:
+        """Scanne le buffer avec Hyperscan, arrêt au premier match"""
+        matched = []
+        
+        def on_match(pattern_id, start, end, flags, context):
+            matched.append(pattern_id)
+            return True  # Stopper le scan
+        
+        try:
+            self._hs_db.scan(data, match_event_handler=on_match)
+        except hyperscan.error:
+            # Le scan interrompu par le callback lève une erreur selon les versions
+            if not matched:
+                raise
+        return bool(matched)
     
     async def dispatch(self, request: Request, call_next):
         """Traite chaque requête"""
@@ -38,14 +236,27 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         if not self._check_host(request):
             raise HTTPException(status_code=400, detail="Host non autorisé")
         
-        # 2. Vérification IP blacklist
+        # 2. Vérification IP blacklist (IP mémorisée pour les logs en aval)
         client_ip = self._get_client_ip(request)
-        if client_ip in self.blocked_ips:
+        request.state.client_ip = client_ip
+        if self._is_blocked(client_ip):
             raise HTTPException(status_code=403, detail="Accès refusé")
+        if self._redis is not None:
+            denied = await self._check_shared_limits(client_ip)
+            if denied == 403:
+                raise HTTPException(status_code=403, detail="Accès refusé")
+            if denied == 429:
+                raise HTTPException(status_code=429, detail="Trop de requêtes")
+        
+        # URL sérialisée une seule fois pour la détection et les logs
+        url_str = str(request.url)
+        request.state.url_str = url_str
         
         # 3. Détection d'attaques
-        if self._detect_attack_patterns(request):
+        if self._detect_attack_patterns(request, url_str):
             self._log_suspicious_activity(request)
+            if self._redis is not None:
+                await self._record_suspicious(client_ip)
             raise HTTPException(status_code=400, detail="Requête suspecte détectée")
         
         # 4. Limite de taille des requêtes
@@ -53,16 +264,16 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             raise HTTPException(status_code=413, detail="Requête trop volumineuse")
         
         # 5. Traiter la requête
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         response = await call_next(request)
-        process_time = time.time() - start_time
+        elapsed_ns = time.perf_counter_ns() - start_ns
         
         # 6. Ajouter headers de sécurité
         self._add_security_headers(response)
         
         # 7. Logger les temps de réponse lents (potentielle attaque DoS)
-        if process_time > 5.0:  # Plus de 5 secondes
-            self._log_slow_request(request, process_time)
+        if elapsed_ns > SLOW_REQUEST_NS:
+            self._log_slow_request(request, elapsed_ns / 1e9)
         
         return response
     
@@ -82,29 +293,36 @@ class SecurityMiddleware(BaseHTTPMiddleware):
     def _check_host(self, request: Request) -> bool:
         """Vérifie que l'host est autorisé"""
         host = request.headers.get("host", "")
-        host_without_port = host.split(":")[0]
+        host_without_port = host.split(":")[0].lower()
+        request.state.host = host_without_port
         return host_without_port in self.allowed_hosts
     
-    def _detect_attack_patterns(self, request: Request) -> bool:
+    def _detect_attack_patterns(self, request: Request, url_str: str) -> bool:
         """Détecte les patterns d'attaques communes"""
-        import re
+        # URL + headers dans un seul buffer ; le séparateur \n empêche les
+        # correspondances à cheval ('.' ne traverse pas les fins de ligne)
+        blob = "\n".join((url_str, *request.headers.values()))
         
-        # Vérifier l'URL
-        url_str = str(request.url)
-        for pattern in self.suspicious_patterns:
-            if re.search(pattern, url_str, re.IGNORECASE):
+        if self._hs_db is not None:
+            if self._hyperscan_match(blob.encode("utf-8", "surrogateescape")):
                 return True
-        
-        # Vérifier les headers
-        for header_name, header_value in request.headers.items():
-            for pattern in self.suspicious_patterns:
-                if re.search(pattern, header_value, re.IGNORECASE):
+        else:
+            # Passage unique en minuscules, arrêt au premier littéral
+            lowered = blob.lower()
+            if self._automaton is not None:
+                if next(self._automaton.iter(lowered), None) is not None:
+                    return True
+            elif any(literal in lowered for literal in self._literal_patterns):
+                return True
+            # La regex à jokers (backtracking sur .*) ne tourne que si un mot-clé
+            # d'ancrage est présent, ce qui n'est pas le cas du trafic normal
+            if any(anchor in lowered for anchor in self._wildcard_anchors):
+                if self._wildcard_re.search(lowered):
                     return True
         
         # Vérifier User-Agent suspect
-        user_agent = request.headers.get("user-agent", "")
-        suspicious_agents = ["sqlmap", "nmap", "nikto", "dirb", "gobuster", "curl/7"]
-        if any(agent in user_agent.lower() for agent in suspicious_agents):
+        user_agent = request.headers.get("user-agent", "").lower()
+        if any(agent in user_agent for agent in SUSPICIOUS_AGENTS):
             return True
         
         return False
@@ -112,54 +330,58 @@ class SecurityMiddleware(BaseHTTPMiddleware):
     def _check_request_size(self, request: Request) -> bool:
         """Vérifie la taille de la requête"""
         content_length = request.headers.get("content-length")
-        if content_length:
-            try:
-                size = int(content_length)
-                # Limite à 50MB (sauf pour uploads)
-                max_size = 50 * 1024 * 1024
-                if "/upload" in str(request.url):
-                    max_size = 100 * 1024 * 1024  # 100MB pour uploads
-                return size <= max_size
-            except ValueError:
-                return False
-        return True
+        if not content_length:
+            return True
+        # Moins de 8 chiffres (< 10MB) : sous toutes les limites, pas besoin de int()
+        if len(content_length) < 8 and content_length.isdigit():
+            return True
+        try:
+            size = int(content_length)
+        except ValueError:
+            return False
+        # Limite à 50MB (100MB pour uploads)
+        max_size = 100 * 1024 * 1024 if "/upload" in request.url.path else 50 * 1024 * 1024
+        return size <= max_size
     
     def _add_security_headers(self, response: Response):
         """Ajoute des headers de sécurité supplémentaires"""
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["X-Download-Options"] = "noopen"
-        response.headers["X-Permitted-Cross-Domain-Policies"] = "none"
-        
-        # Header personnalisé pour identifier l'application
-        response.headers["X-Powered-By"] = "LocAppart-Secure"
+        # Ajout direct à la liste brute : un seul extend au lieu d'une réécriture par header
+        response.raw_headers.extend(SECURITY_HEADERS_RAW)
     
     def _log_suspicious_activity(self, request: Request):
         """Log une activité suspecte"""
-        client_ip = self._get_client_ip(request)
-        user_agent = request.headers.get("user-agent", "unknown")
-        
-        print(f"🚨 ACTIVITÉ SUSPECTE DÉTECTÉE:")
-        print(f"   IP: {client_ip}")
-        print(f"   URL: {request.url}")
-        print(f"   User-Agent: {user_agent}")
-        print(f"   Method: {request.method}")
-        
-        # Ajouter à la blacklist temporaire après 3 tentatives
-        # (En production, utiliser Redis ou base de données)
+        if not logger.isEnabledFor(logging.WARNING):
+            return
+        client_ip = getattr(request.state, "client_ip", None) or self._get_client_ip(request)
+        url_str = getattr(request.state, "url_str", None) or str(request.url)
+        logger.warning(
+            "🚨 ACTIVITÉ SUSPECTE DÉTECTÉE: ip=%s url=%s method=%s user_agent=%s",
+            client_ip, url_str, request.method, request.headers.get("user-agent", "unknown"),
+            extra={"ip": client_ip, "method": request.method},
+        )
         
     def _log_slow_request(self, request: Request, process_time: float):
         """Log une requête lente"""
-        client_ip = self._get_client_ip(request)
-        print(f"⚠️  REQUÊTE LENTE DÉTECTÉE:")
-        print(f"   IP: {client_ip}")
-        print(f"   URL: {request.url}")
-        print(f"   Temps: {process_time:.2f}s")
+        if not logger.isEnabledFor(logging.WARNING):
+            return
+        client_ip = getattr(request.state, "client_ip", None) or self._get_client_ip(request)
+        url_str = getattr(request.state, "url_str", None) or str(request.url)
+        logger.warning(
+            "⚠️  REQUÊTE LENTE DÉTECTÉE: ip=%s url=%s temps=%.2fs",
+            client_ip, url_str, process_time,
+            extra={"ip": client_ip, "process_time": process_time},
+        )
 
-def create_security_middleware(allowed_hosts: Set[str] = None):
+def create_security_middleware(allowed_hosts: Set[str] = None, blocked_networks: Iterable[str] = None):
     """Factory pour créer le middleware de sécurité"""
     if not allowed_hosts:
         # Récupérer depuis les variables d'environnement
         hosts_env = os.getenv("ALLOWED_HOSTS", "localhost,127.0.0.1")
         allowed_hosts = set(host.strip() for host in hosts_env.split(","))
     
-    return SecurityMiddleware(None, allowed_hosts)
\ No newline at end of file
+    if blocked_networks is None:
+        # Liste d'IP / plages CIDR séparées par des virgules (ex: "10.0.0.0/8,1.2.3.4")
+        blocked_env = os.getenv("BLOCKED_IPS", "")
+        blocked_networks = [net.strip() for net in blocked_env.split(",") if net.strip()]
+    
+    return SecurityMiddleware(None, allowed_hosts, blocked_networks)
\ No newline at end of file
@@ -2,18 +2,19 @@
 Service d'administration pour le panel admin
 Gestion des utilisateurs, propriétés et statistiques
 """
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Union
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc, text
-from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, func, desc, text, case, literal, null, tuple_, inspect
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import date, datetime, timedelta, timezone
 import json
 
-from models import UserAuth, Building, Apartment, ApartmentUserLink
+from models import UserAuth, Building, Apartment, ApartmentUserLink, UserSubscription
 from models_admin import AdminUser, AdminAction, UserStatusHistory, SystemSettings
 from models_multipropriete import PropertyGroup, PropertyGroupMember
 from enums import (
     AdminRole, UserStatus, AccountAction, UserRole, 
-    SubscriptionType, AuthType
+    SubscriptionType, SubscriptionStatus, AuthType
 )
 from services.subscription_service import SubscriptionService
 from services.multipropriete_service import MultiproprietService
@@ -21,6 +22,35 @@ from error_handlers import PermissionErrorHandler, BusinessLogicErrorHandler
 from audit_logger import AuditLogger
 
 
+# Colonne ajoutée par extend_user_model_for_admin() : testée une fois au chargement
+# plutôt qu'à chaque utilisateur (l'extension doit être appliquée avant cet import)
+_HAS_USER_STATUS = hasattr(UserAuth, 'user_status')
+# Colonne ajoutée par le module de multipropriété ; sans elle, pas de quotas de groupe
+_HAS_MULTIPROPRIETE = hasattr(Apartment, 'property_group_id')
+
+# Fenêtre de la courbe de croissance du dashboard, en jours
+USER_GROWTH_DAYS = 7
+
+# Index (user_status, suspension_expires_at) créé par migrate_admin_system.py ;
+# sa présence est vérifiée une fois par processus (None tant que non vérifiée)
+SUSPENSION_INDEX = "idx_user_auth_status_suspension"
+_has_suspension_index: Optional[bool] = None
+
+
+def _utcnow() -> datetime:
+    """Instant UTC naïf, comme les colonnes DateTime (sans fuseau) des modèles"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _suspension_index_exists(db: Session) -> bool:
+    """Indique si SUSPENSION_INDEX existe en base (inspection faite au premier appel)"""
+    global _has_suspension_index
+    if _has_suspension_index is None:
+        indexes = inspect(db.get_bind()).get_indexes(UserAuth.__tablename__)
+        _has_suspension_index = any(index["name"] == SUSPENSION_INDEX for index in indexes)
+    return _has_suspension_index
+
+
 class AdminDashboardData:
     """Données du tableau de bord administrateur"""
     
@@ -68,20 +98,44 @@ class AdminService:
     """
     
     @staticmethod
-    def check_admin_permission(db: Session, user_id: int, required_permission: str) -> bool:
+    def check_admin_permission(db: Session, user_id: int, required_permission: Union[str, int]) -> bool:
         """
         Vérifie les permissions administrateur d'un utilisateur
+        (nom de permission ou masque PERM_* de models_admin)
         """
-        admin_user = db.query(AdminUser).filter(
-            AdminUser.user_id == user_id,
-            AdminUser.is_active == True
-        ).first()
+        admin_user = AdminService._get_active_admin(db, user_id)
         
         if not admin_user:
             return False
         
         return admin_user.has_permission(required_permission)
     
+    @staticmethod
+    def _get_active_admin(db: Session, user_id: int) -> Optional[AdminUser]:
+        """
+        Récupère l'AdminUser actif, mémorisé dans la session (une session par requête HTTP)
+        L'objet est mis en cache plutôt que le booléen : has_permission reflète ainsi
+        toute modification de rôle faite dans la même session
+        """
+        cache = db.info.setdefault("admin_service_active_admins", {})
+        if user_id not in cache:
+            cache[user_id] = db.query(AdminUser).filter(
+                AdminUser.user_id == user_id,
+                AdminUser.is_active == True
+            ).first()
+        return cache[user_id]
+    
+    @staticmethod
+    def _optional_user_column(name: str, default: Any):
+        """
+        Colonne UserAuth éventuellement absente (ajoutée par extension du modèle) :
+        la colonne si elle existe, sinon la valeur par défaut, étiquetée du même nom
+        """
+        column = getattr(UserAuth, name, None)
+        if column is None:
+            column = null() if default is None else literal(default)
+        return column.label(name)
+    
     @staticmethod
     def get_admin_dashboard(db: Session, admin_user_id: int) -> AdminDashboardData:
         """
@@ -91,67 +145,88 @@ class AdminService:
         if not AdminService.check_admin_permission(db, admin_user_id, "view_dashboard"):
             raise PermissionErrorHandler.access_denied("Accès au tableau de bord refusé")
         
-        # Statistiques générales
-        total_users = db.query(func.count(UserAuth.id)).scalar()
-        active_users = db.query(func.count(UserAuth.id)).filter(
-            UserAuth.user_status == UserStatus.ACTIVE
-        ).scalar()
+        today = _utcnow().date()
+        # Bornes en intervalles semi-ouverts sur created_at (pas de DATE(col), l'index reste utilisable)
+        today_start = datetime.combine(today, datetime.min.time())
+        tomorrow_start = today_start + timedelta(days=1)
+        week_start = today_start - timedelta(days=7)
+        
+        # Statistiques utilisateurs : un seul passage avec agrégats conditionnels
+        # COUNT(*) laisse InnoDB choisir l'index secondaire le plus étroit
+        user_counts = db.query(
+            func.count(),
+            func.sum(case((UserAuth.user_status == UserStatus.ACTIVE, 1), else_=0)),
+            func.sum(case((and_(UserAuth.created_at >= today_start, UserAuth.created_at < tomorrow_start), 1), else_=0)),
+            func.sum(case((and_(UserAuth.created_at >= week_start, UserAuth.created_at < tomorrow_start), 1), else_=0))
+        ).one()
+        # SUM renvoie NULL sur une table vide et un Decimal sous MySQL
+        total_users, active_users, new_users_today, new_users_week = (
+            int(value or 0) for value in user_counts
+        )
         
-        # Compter les utilisateurs Premium
-        try:
-            premium_users = 0  # À implémenter avec le service d'abonnement
-        except:
-            premium_users = 0
+        # Utilisateurs Premium : abonnements actifs groupés par type
+        subscription_counts = SubscriptionService.get_breakdown(db)
+        premium_users = subscription_counts.get(SubscriptionType.PREMIUM, 0)
         
-        total_apartments = db.query(func.count(Apartment.id)).scalar()
-        total_buildings = db.query(func.count(Building.id)).scalar()
+        # Compteurs des propriétés en un aller-retour
+        total_apartments, total_buildings = db.query(
+            db.query(func.count()).select_from(Apartment).scalar_subquery(),
+            db.query(func.count()).select_from(Building).scalar_subquery()
+        ).one()
         
         try:
-            total_groups = db.query(func.count(PropertyGroup.id)).scalar()
-        except:
+            total_groups = db.query(func.count()).select_from(PropertyGroup).scalar()
+        except SQLAlchemyError:
             total_groups = 0
         
-        # Nouveaux utilisateurs
-        today = datetime.utcnow().date()
-        week_ago = today - timedelta(days=7)
-        
-        new_users_today = db.query(func.count(UserAuth.id)).filter(
-            func.date(UserAuth.created_at) == today
-        ).scalar()
-        
-        new_users_week = db.query(func.count(UserAuth.id)).filter(
-            func.date(UserAuth.created_at) >= week_ago
-        ).scalar()
-        
-        # Inscriptions récentes
-        recent_signups = []
-        recent_users = db.query(UserAuth).order_by(
+        # Inscriptions récentes (colonnes utiles uniquement, sans objets ORM)
+        recent_users = db.query(
+            UserAuth.id,
+            UserAuth.email,
+            UserAuth.first_name,
+            UserAuth.last_name,
+            UserAuth.created_at,
+            UserAuth.auth_type,
+            AdminService._optional_user_column("user_status", "active")
+        ).order_by(
             desc(UserAuth.created_at)
         ).limit(10).all()
         
-        for user in recent_users:
-            recent_signups.append({
-                "id": user.id,
-                "email": user.email,
-                "name": f"{user.first_name} {user.last_name}",
-                "created_at": user.created_at,
-                "auth_type": user.auth_type,
-                "status": user.user_status if hasattr(user, 'user_status') else "active"
-            })
-        
-        # Croissance utilisateurs (7 derniers jours)
-        user_growth = []
-        for i in range(7):
-            date = today - timedelta(days=i)
-            count = db.query(func.count(UserAuth.id)).filter(
-                func.date(UserAuth.created_at) == date
-            ).scalar()
-            user_growth.append({
-                "date": date.isoformat(),
-                "count": count
-            })
-        
-        # Répartition des abonnements
+        recent_signups = [
+            {
+                "id": user_id,
+                "email": email,
+                "name": f"{first_name} {last_name}",
+                "created_at": created_at,
+                "auth_type": auth_type,
+                "status": user_status
+            }
+            for user_id, email, first_name, last_name, created_at, auth_type, user_status in recent_users
+        ]
+        
+        # Croissance utilisateurs (USER_GROWTH_DAYS derniers jours) : une seule requête groupée par jour
+        growth_start = today_start - timedelta(days=USER_GROWTH_DAYS - 1)
+        signup_day = func.date(UserAuth.created_at).label("signup_day")
+        daily_counts = db.query(signup_day, func.count(UserAuth.id)).filter(
+            UserAuth.created_at >= growth_start,
+            UserAuth.created_at < tomorrow_start
+        ).group_by(signup_day).all()
+        
+        # Remplissage direct des seaux par ancienneté en jours : un passage sur les lignes
+        # renvoyées, sans recherche par date pour chaque jour de la fenêtre
+        buckets = [0] * USER_GROWTH_DAYS
+        for day, count in daily_counts:
+            # DATE() renvoie une date (MySQL) ou une chaîne ISO (SQLite)
+            if isinstance(day, str):
+                day = date.fromisoformat(day)
+            buckets[(today - day).days] = count
+        
+        user_growth = [
+            {"date": (today - timedelta(days=days_ago)).isoformat(), "count": count}
+            for days_ago, count in enumerate(buckets)
+        ]
+        
+        # Répartition des abonnements (sans abonnement Premium actif = gratuit)
         subscription_breakdown = {
             "free": total_users - premium_users,
             "premium": premium_users
@@ -185,22 +260,25 @@ class AdminService:
         status_filter: str = None,
         subscription_filter: str = None,
         sort_by: str = "created_at",
-        sort_order: str = "desc"
+        sort_order: str = "desc",
+        cursor: str = None
     ) -> Dict[str, Any]:
         """
         Récupère la liste des utilisateurs avec filtres et pagination
+        
+        Tri par date d'inscription sans recherche : pagination par curseur (keyset)
+        possible via `cursor` (valeur `next_cursor` de la page précédente), qui
+        remplace l'OFFSET et reste une recherche d'index quelle que soit la page
         """
         # Vérifier les permissions
         if not AdminService.check_admin_permission(db, admin_user_id, "manage_users"):
             raise PermissionErrorHandler.access_denied("Accès à la gestion des utilisateurs refusé")
         
-        # Construction de la requête de base
-        query = db.query(UserAuth)
-        
         # Filtres
+        filters = []
         if search:
             search_term = f"%{search}%"
-            query = query.filter(
+            filters.append(
                 or_(
                     UserAuth.email.ilike(search_term),
                     UserAuth.first_name.ilike(search_term),
@@ -208,45 +286,101 @@ class AdminService:
                 )
             )
         
-        if status_filter and hasattr(UserAuth, 'user_status'):
-            query = query.filter(UserAuth.user_status == status_filter)
+        if status_filter and _HAS_USER_STATUS:
+            filters.append(UserAuth.user_status == status_filter)
         
         # Compter le total avant pagination
-        total_count = query.count()
+        total_count = db.query(func.count()).select_from(UserAuth).filter(*filters).scalar()
+        
+        # Projection SQL de la ligne complète : colonnes de la liste, nombre d'appartements
+        # possédés (sous-requête corrélée) et abonnement (au plus un par utilisateur)
+        apartment_count = db.query(func.count(ApartmentUserLink.apartment_id)).filter(
+            ApartmentUserLink.user_id == UserAuth.id,
+            ApartmentUserLink.role == UserRole.owner
+        ).correlate(UserAuth).scalar_subquery().label("apartment_count")
+        
+        query = db.query(
+            UserAuth.id,
+            UserAuth.email,
+            UserAuth.first_name,
+            UserAuth.last_name,
+            UserAuth.phone,
+            UserAuth.created_at,
+            UserAuth.auth_type,
+            UserAuth.email_verified,
+            AdminService._optional_user_column("user_status", "active"),
+            AdminService._optional_user_column("last_login_at", None),
+            AdminService._optional_user_column("full_address", ""),
+            apartment_count,
+            UserSubscription.subscription_type,
+            UserSubscription.status.label("subscription_status")
+        ).outerjoin(
+            UserSubscription, UserSubscription.user_id == UserAuth.id
+        ).filter(*filters)
         
         # Tri
         sort_column = getattr(UserAuth, sort_by, UserAuth.created_at)
-        if sort_order == "desc":
+        keyset = sort_column is UserAuth.created_at and not search
+        if keyset:
+            # (created_at, id) : ordre total, exploitable par un parcours d'index
+            if sort_order == "desc":
+                query = query.order_by(desc(UserAuth.created_at), desc(UserAuth.id))
+            else:
+                query = query.order_by(UserAuth.created_at, UserAuth.id)
+        elif sort_order == "desc":
             query = query.order_by(desc(sort_column))
         else:
             query = query.order_by(sort_column)
         
         # Pagination
-        offset = (page - 1) * per_page
-        users = query.offset(offset).limit(per_page).all()
+        if keyset and cursor:
+            cursor_created_at, cursor_id = AdminService._decode_users_cursor(cursor)
+            position = tuple_(UserAuth.created_at, UserAuth.id)
+            if sort_order == "desc":
+                query = query.filter(position < tuple_(cursor_created_at, cursor_id))
+            else:
+                query = query.filter(position > tuple_(cursor_created_at, cursor_id))
+            users = query.limit(per_page).all()
+        else:
+            offset = (page - 1) * per_page
+            users = query.offset(offset).limit(per_page).all()
+        
+        next_cursor = None
+        if keyset and len(users) == per_page and users[-1].created_at is not None:
+            next_cursor = f"{users[-1].created_at.isoformat()}|{users[-1].id}"
+        
+        # Abonnement effectif : comme SubscriptionService.get_user_subscription,
+        # un abonnement non actif (ou absent) vaut abonnement gratuit
+        subscriptions = {
+            user.id: (
+                {"type": user.subscription_type, "status": user.subscription_status}
+                if user.subscription_status == SubscriptionStatus.ACTIVE
+                else {"type": SubscriptionType.FREE, "status": SubscriptionStatus.ACTIVE}
+            )
+            for user in users
+        }
+        
+        # Quotas multipropriété (uniquement si le module est installé)
+        quotas_by_user = {}
+        if _HAS_MULTIPROPRIETE:
+            quotas_by_user = MultiproprietService.get_user_apartment_quotas_bulk(
+                db, list(subscriptions), subscriptions
+            )
         
-        # Enrichir les données utilisateurs
         users_data = []
         for user in users:
-            # Compter les appartements
-            apartment_count = db.query(func.count(ApartmentUserLink.apartment_id)).filter(
-                ApartmentUserLink.user_id == user.id,
-                ApartmentUserLink.role == UserRole.owner
-            ).scalar()
-            
-            # Récupérer le statut d'abonnement
-            subscription = SubscriptionService.get_user_subscription(db, user.id)
+            apartment_count = user.apartment_count or 0
+            subscription = subscriptions[user.id]
             
-            # Quotas multipropriété
-            try:
-                quotas = MultiproprietService.get_user_apartment_quotas(db, user.id)
+            quotas = quotas_by_user.get(user.id)
+            if quotas is not None:
                 multipropriete_data = {
                     "personal_apartments": quotas["personal_apartments"],
                     "sponsored_apartments": quotas["sponsored_apartments"],
                     "accessible_apartments": quotas["accessible_via_groups"],
                     "can_sponsor": quotas["can_sponsor_groups"]
                 }
-            except:
+            else:
                 multipropriete_data = {
                     "personal_apartments": apartment_count,
                     "sponsored_apartments": 0,
@@ -263,13 +397,13 @@ class AdminService:
                 "created_at": user.created_at,
                 "auth_type": user.auth_type,
                 "email_verified": user.email_verified,
-                "user_status": getattr(user, 'user_status', 'active'),
+                "user_status": user.user_status,
                 "subscription_type": subscription["type"],
                 "subscription_status": subscription["status"],
                 "apartment_count": apartment_count,
                 "multipropriete": multipropriete_data,
-                "last_login": getattr(user, 'last_login_at', None),
-                "full_address": getattr(user, 'full_address', '')
+                "last_login": user.last_login_at,
+                "full_address": user.full_address
             })
         
         return {
@@ -278,7 +412,8 @@ class AdminService:
                 "total": total_count,
                 "page": page,
                 "per_page": per_page,
-                "pages": (total_count + per_page - 1) // per_page
+                "pages": (total_count + per_page - 1) // per_page,
+                "next_cursor": next_cursor
             },
             "filters": {
                 "search": search,
@@ -289,6 +424,15 @@ class AdminService:
             }
         }
     
+    @staticmethod
+    def _decode_users_cursor(cursor: str) -> Tuple[datetime, int]:
+        """Décode un curseur `<created_at ISO>|<id>` de la liste utilisateurs"""
+        try:
+            created_at, user_id = cursor.rsplit("|", 1)
+            return datetime.fromisoformat(created_at), int(user_id)
+        except ValueError:
+            raise ValueError("Curseur de pagination invalide")
+    
     @staticmethod
     def get_user_detailed_info(db: Session, admin_user_id: int, target_user_id: int) -> UserDetailedInfo:
         """
@@ -314,7 +458,7 @@ class AdminService:
             "auth_type": user.auth_type,
             "email_verified": user.email_verified,
             "email_verified_at": user.email_verified_at,
-            "user_status": getattr(user, 'user_status', 'active'),
+            "user_status": user.user_status if _HAS_USER_STATUS else 'active',
             "admin_notes": getattr(user, 'admin_notes', ''),
             "suspension_reason": getattr(user, 'suspension_reason', ''),
             "suspension_expires_at": getattr(user, 'suspension_expires_at', None),
@@ -357,14 +501,14 @@ class AdminService:
         if not target_user:
             raise ValueError("Utilisateur non trouvé")
         
-        # Récupérer l'admin
-        admin_user = db.query(AdminUser).filter(AdminUser.user_id == admin_user_id).first()
+        # L'admin a déjà été chargé (et mémorisé) par la vérification de permission
+        admin_user = AdminService._get_active_admin(db, admin_user_id)
         if not admin_user:
             raise ValueError("Administrateur non trouvé")
         
         # Sauvegarder l'état avant
         before_data = {
-            "user_status": getattr(target_user, 'user_status', 'active'),
+            "user_status": target_user.user_status if _HAS_USER_STATUS else 'active',
             "email_verified": target_user.email_verified,
             "suspension_reason": getattr(target_user, 'suspension_reason', None),
             "suspension_expires_at": getattr(target_user, 'suspension_expires_at', None)
@@ -376,7 +520,7 @@ class AdminService:
         if success:
             # Sauvegarder l'état après
             after_data = {
-                "user_status": getattr(target_user, 'user_status', 'active'),
+                "user_status": target_user.user_status if _HAS_USER_STATUS else 'active',
                 "email_verified": target_user.email_verified,
                 "suspension_reason": getattr(target_user, 'suspension_reason', None),
                 "suspension_expires_at": getattr(target_user, 'suspension_expires_at', None)
@@ -423,43 +567,45 @@ class AdminService:
         """
         Exécute l'action spécifique sur l'utilisateur
         """
+        # Un seul instant pour toutes les dates posées par l'action
+        now = _utcnow()
         try:
             if action == AccountAction.ACTIVATE:
-                if hasattr(user, 'user_status'):
+                if _HAS_USER_STATUS:
                     user.user_status = UserStatus.ACTIVE
                 user.suspension_reason = None
                 user.suspension_expires_at = None
                 
             elif action == AccountAction.DEACTIVATE:
-                if hasattr(user, 'user_status'):
+                if _HAS_USER_STATUS:
                     user.user_status = UserStatus.INACTIVE
                 
             elif action == AccountAction.SUSPEND:
-                if hasattr(user, 'user_status'):
+                if _HAS_USER_STATUS:
                     user.user_status = UserStatus.SUSPENDED
                 user.suspension_reason = reason
                 if duration_days:
-                    user.suspension_expires_at = datetime.utcnow() + timedelta(days=duration_days)
+                    user.suspension_expires_at = now + timedelta(days=duration_days)
                 
             elif action == AccountAction.UNSUSPEND:
-                if hasattr(user, 'user_status'):
+                if _HAS_USER_STATUS:
                     user.user_status = UserStatus.ACTIVE
                 user.suspension_reason = None
                 user.suspension_expires_at = None
                 
             elif action == AccountAction.BAN:
-                if hasattr(user, 'user_status'):
+                if _HAS_USER_STATUS:
                     user.user_status = UserStatus.BANNED
                 user.suspension_reason = reason
                 
             elif action == AccountAction.UNBAN:
-                if hasattr(user, 'user_status'):
+                if _HAS_USER_STATUS:
                     user.user_status = UserStatus.ACTIVE
                 user.suspension_reason = None
                 
             elif action == AccountAction.FORCE_EMAIL_VERIFICATION:
                 user.email_verified = True
-                user.email_verified_at = datetime.utcnow()
+                user.email_verified_at = now
                 
             elif action == AccountAction.RESET_PASSWORD:
                 # Marquer que le mot de passe doit être réinitialisé
@@ -467,7 +613,7 @@ class AdminService:
                 pass
                 
             # Mettre à jour la date de dernière action admin
-            user.last_admin_action = datetime.utcnow()
+            user.last_admin_action = now
             
             return True
             
@@ -480,23 +626,40 @@ class AdminService:
         """
         Récupère les informations sur les propriétés d'un utilisateur
         """
-        # Appartements en propriété directe
-        apartments = db.query(Apartment).join(ApartmentUserLink).filter(
+        # Appartements en propriété directe : projection des colonnes affichées
+        # (immeuble et groupe par jointures externes, sans objets ORM ni identity map)
+        if _HAS_MULTIPROPRIETE:
+            group_columns = (Apartment.property_group_id, PropertyGroup.name.label("group_name"))
+        else:
+            group_columns = (null().label("property_group_id"), null().label("group_name"))
+        query = db.query(
+            Apartment.id,
+            Apartment.type_logement,
+            Apartment.floor,
+            Building.name.label("building_name"),
+            *group_columns
+        ).join(ApartmentUserLink).outerjoin(
+            Building, Building.id == Apartment.building_id
+        )
+        if _HAS_MULTIPROPRIETE:
+            query = query.outerjoin(PropertyGroup, PropertyGroup.id == Apartment.property_group_id)
+        apartments = query.filter(
             ApartmentUserLink.user_id == user_id,
             ApartmentUserLink.role == UserRole.owner
         ).all()
         
-        apartments_data = []
-        for apt in apartments:
-            apartments_data.append({
+        apartments_data = [
+            {
                 "id": apt.id,
-                "name": getattr(apt, 'name', f"Appartement {apt.id}"),
-                "building_name": apt.building.name if apt.building else None,
+                "name": f"Appartement {apt.id}",
+                "building_name": apt.building_name,
                 "type_logement": apt.type_logement,
                 "floor": apt.floor,
                 "is_in_group": apt.property_group_id is not None,
-                "group_name": apt.property_group.name if apt.property_group else None
-            })
+                "group_name": apt.group_name
+            }
+            for apt in apartments
+        ]
         
         # Groupes de multipropriété
         try:
@@ -511,7 +674,7 @@ class AdminService:
                 "member_groups": dashboard.member_groups,
                 "can_create_groups": dashboard.can_create_groups
             }
-        except:
+        except (SQLAlchemyError, ValueError):
             multipropriete_data = {
                 "personal_apartments": len(apartments_data),
                 "sponsored_apartments": 0,
@@ -532,40 +695,69 @@ class AdminService:
         """
         Récupère les informations d'activité d'un utilisateur
         """
-        # Actions administratives reçues
-        admin_actions = db.query(AdminAction).filter(
+        # Actions administratives reçues, avec l'email de l'admin par jointures
+        # (projection en lecture seule, sans objets ORM)
+        admin_email = UserAuth.email.label("admin_email")
+        admin_actions = db.query(
+            AdminAction.id,
+            AdminAction.action_type,
+            AdminAction.description,
+            AdminAction.reason,
+            AdminAction.created_at,
+            admin_email
+        ).outerjoin(
+            AdminUser, AdminUser.id == AdminAction.admin_user_id
+        ).outerjoin(
+            UserAuth, UserAuth.id == AdminUser.user_id
+        ).filter(
             AdminAction.target_user_id == user_id
         ).order_by(desc(AdminAction.created_at)).limit(10).all()
         
-        admin_actions_data = []
-        for action in admin_actions:
-            admin_actions_data.append({
+        admin_actions_data = [
+            {
                 "id": action.id,
                 "action_type": action.action_type,
                 "description": action.description,
                 "reason": action.reason,
                 "created_at": action.created_at,
-                "admin_email": action.admin_user.user.email if action.admin_user else "Système"
-            })
+                "admin_email": action.admin_email or "Système"
+            }
+            for action in admin_actions
+        ]
         
         # Historique des statuts
         status_history = []
         if hasattr(UserAuth, 'status_history'):
-            history = db.query(UserStatusHistory).filter(
+            history = db.query(
+                UserStatusHistory.id,
+                UserStatusHistory.previous_status,
+                UserStatusHistory.new_status,
+                UserStatusHistory.reason,
+                UserStatusHistory.created_at,
+                UserStatusHistory.expires_at,
+                admin_email
+            ).outerjoin(
+                AdminUser, AdminUser.id == UserStatusHistory.changed_by_admin_id
+            ).outerjoin(
+                UserAuth, UserAuth.id == AdminUser.user_id
+            ).filter(
                 UserStatusHistory.user_id == user_id
             ).order_by(desc(UserStatusHistory.created_at)).limit(10).all()
             
-            for h in history:
-                status_history.append({
+            now = _utcnow()
+            status_history = [
+                {
                     "id": h.id,
                     "previous_status": h.previous_status,
                     "new_status": h.new_status,
                     "reason": h.reason,
                     "created_at": h.created_at,
-                    "changed_by": h.changed_by_admin.user.email if h.changed_by_admin else "Système",
+                    "changed_by": h.admin_email or "Système",
                     "expires_at": h.expires_at,
-                    "is_temporary": h.is_temporary
-                })
+                    "is_temporary": h.expires_at is not None and h.expires_at > now
+                }
+                for h in history
+            ]
         
         return {
             "admin_actions": admin_actions_data,
@@ -580,14 +772,21 @@ class AdminService:
         Récupère les alertes système
         """
         alerts = []
+        now = _utcnow()
         
         # Utilisateurs suspendus avec expiration proche
         try:
-            expiring_suspensions = db.query(UserAuth).filter(
+            # Égalité sur le statut puis plage sur l'expiration : range scan sur
+            # l'index (user_status, suspension_expires_at), imposé à MySQL
+            query = db.query(func.count()).select_from(UserAuth).filter(
                 UserAuth.user_status == UserStatus.SUSPENDED,
-                UserAuth.suspension_expires_at <= datetime.utcnow() + timedelta(days=1),
-                UserAuth.suspension_expires_at > datetime.utcnow()
-            ).count()
+                UserAuth.suspension_expires_at > now,
+                UserAuth.suspension_expires_at <= now + timedelta(days=1)
+            )
+            # Sans l'index (migration non appliquée), requête sans indice
+            if _suspension_index_exists(db):
+                query = query.with_hint(UserAuth, f"USE INDEX ({SUSPENSION_INDEX})", "mysql")
+            expiring_suspensions = query.scalar()
             
             if expiring_suspensions > 0:
                 alerts.append({
@@ -596,15 +795,16 @@ class AdminService:
                     "message": f"{expiring_suspensions} suspension(s) expirent dans les 24h",
                     "action_url": "/admin/users?filter=suspended"
                 })
-        except:
+        except SQLAlchemyError:
             pass
         
         # Nouveaux utilisateurs non vérifiés
         try:
-            unverified_count = db.query(UserAuth).filter(
+            # Couvert par l'index (email_verified, created_at)
+            unverified_count = db.query(func.count()).select_from(UserAuth).filter(
                 UserAuth.email_verified == False,
-                UserAuth.created_at >= datetime.utcnow() - timedelta(days=7)
-            ).count()
+                UserAuth.created_at >= now - timedelta(days=7)
+            ).scalar()
             
             if unverified_count > 10:
                 alerts.append({
@@ -613,7 +813,7 @@ class AdminService:
                     "message": f"{unverified_count} nouveaux utilisateurs n'ont pas vérifié leur email",
                     "action_url": "/admin/users?filter=unverified"
                 })
-        except:
+        except SQLAlchemyError:
             pass
         
         return alerts
\ No newline at end of file
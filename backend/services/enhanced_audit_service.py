@@ -3,23 +3,159 @@ Service d'audit avancé avec capacités de backup et undo
 Remplace et enrichit l'audit_logger existant
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, func
-from typing import Dict, Any, List, Optional, Tuple
-from datetime import datetime, timedelta
+from sqlalchemy.orm.base import NO_VALUE
+from sqlalchemy.orm.state import InstanceState
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import or_, desc, func, case, event, insert, inspect, update, literal, tuple_
+from typing import Dict, Any, FrozenSet, Iterable, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import gzip
 import json
-import uuid
+import logging
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import attrgetter
 from pathlib import Path
 
+# Sérialisation JSON rapide des backups (optionnel, json de la stdlib sinon)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 from models_audit_enhanced import (
     AuditLogEnhanced, DataBackup, UndoAction, UserNotification, 
-    AuditTransactionGroup, UndoComplexity, UndoStatus, NotificationType
+    AuditTransactionGroup, UndoComplexity, UndoStatus, NotificationType, FileBackupStatus,
+    AUDIT_RETENTION_DAYS, new_transaction_group_id
 )
 from models import UserAuth
 from models_admin import AdminUser
 from enums import ActionType, EntityType, AdminRole
 from error_handlers import BusinessLogicErrorHandler
+from database import BackgroundSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+# Rang SQL de complexité (MAX par groupe) -> niveau ; IMPOSSIBLE ne relève pas le groupe
+_COMPLEXITY_BY_RANK = (UndoComplexity.SIMPLE, UndoComplexity.MODERATE, UndoComplexity.COMPLEX)
+_complexity_rank = attrgetter("rank")
+
+# Seules ces actions peuvent être annulées
+_UNDOABLE_ACTIONS = (ActionType.CREATE, ActionType.UPDATE, ActionType.DELETE)
+
+# Colonnes d'AuditLogEnhanced reprises telles quelles des arguments de log_enhanced_action
+_AUDIT_LOG_FIELDS = (
+    "user_id", "admin_user_id", "action", "entity_type", "entity_id", "description",
+    "before_data", "after_data", "related_entities",
+    "ip_address", "user_agent", "endpoint", "method", "status_code"
+)
+
+
+@lru_cache(maxsize=512)
+def _complexity_for(
+    action: ActionType,
+    entity_type: EntityType,
+    has_related: bool,
+    many_related: bool
+) -> UndoComplexity:
+    """Complexité d'undo pour une clé (action, type d'entité, relations), mémorisée"""
+    # Actions non-undoables
+    if action in [ActionType.READ, ActionType.LOGIN, ActionType.LOGOUT, ActionType.ACCESS_DENIED]:
+        return UndoComplexity.IMPOSSIBLE
+    
+    # UPDATE simple sur utilisateur
+    if action == ActionType.UPDATE and entity_type == EntityType.USER:
+        return UndoComplexity.SIMPLE
+    
+    # DELETE avec beaucoup de relations
+    if action == ActionType.DELETE and many_related:
+        return UndoComplexity.COMPLEX
+    
+    # DELETE d'entités critiques
+    if action == ActionType.DELETE and entity_type in [EntityType.BUILDING, EntityType.COPRO]:
+        return UndoComplexity.COMPLEX
+    
+    # CREATE avec relations
+    if action == ActionType.CREATE and has_related:
+        return UndoComplexity.MODERATE
+    
+    return UndoComplexity.SIMPLE
+
+
+# Au-delà de cette taille sérialisée, le backup est stocké gzippé (restauration rare :
+# compression rapide privilégiée)
+BACKUP_COMPRESSION_THRESHOLD_BYTES = 64 * 1024
+
+# Les modifications ultérieures sont comptées jusqu'à ce plafond (affiché "100+" au-delà)
+LATER_MODIFICATIONS_CAP = 100
+
+
+def _json_bytes(data: Any) -> bytes:
+    """JSON compact en octets UTF-8, via orjson si disponible"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str).encode()
+
+
+def _capped_count(count: int) -> str:
+    """Nombre affiché d'un comptage borné par LATER_MODIFICATIONS_CAP"""
+    return f"{LATER_MODIFICATIONS_CAP}+" if count > LATER_MODIFICATIONS_CAP else str(count)
+
+
+# Copies de fichiers en attente dans session.info, lancées hors requête après le commit
+_PENDING_FILE_BACKUPS = "enhanced_audit_pending_file_backups"
+_file_backup_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="audit-file-backup")
+
+# Audit automatique au flush : modèles suivis -> (type d'entité, colonnes jamais copiées)
+# (voir register_auto_audit), contexte de la session (enable_auto_audit) et changements
+# relevés avant le flush
+_AUTO_AUDIT_ENTITIES: Dict[type, Tuple[EntityType, FrozenSet[str]]] = {}
+_AUTO_AUDIT_CONTEXT = "enhanced_audit_auto_context"
+_AUTO_AUDIT_PENDING = "enhanced_audit_auto_pending"
+_AUTO_AUDIT_LABELS = {
+    ActionType.CREATE: "Création",
+    ActionType.UPDATE: "Modification",
+    ActionType.DELETE: "Suppression"
+}
+
+
+def _audit_value(value: Any) -> Any:
+    """Valeur de colonne sérialisable dans les colonnes JSON d'audit"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _state_snapshot(
+    state: InstanceState,
+    before: bool,
+    excluded_columns: FrozenSet[str] = frozenset()
+) -> Dict[str, Any]:
+    """
+    Colonnes chargées d'une instance, sans requête : valeurs d'origine (historique
+    des attributs modifiés) si `before`, valeurs courantes sinon. Une valeur
+    d'origine jamais chargée est omise, comme les colonnes exclues (secrets)
+    """
+    data = {}
+    for column_attr in state.mapper.column_attrs:
+        if column_attr.key in excluded_columns:
+            continue
+        attribute = state.attrs[column_attr.key]
+        if before and attribute.history.has_changes():
+            deleted = attribute.history.deleted
+            value = deleted[0] if deleted else NO_VALUE
+        else:
+            value = attribute.loaded_value
+        if value is not NO_VALUE:
+            data[column_attr.key] = _audit_value(value)
+    return data
 
 
 class EnhancedAuditService:
@@ -34,13 +170,16 @@ class EnhancedAuditService:
         db: Session,
         group_name: str,
         description: str = None,
-        primary_user_id: int = None
+        primary_user_id: int = None,
+        commit: bool = False
     ) -> str:
         """
         Démarre un groupe de transactions pour actions liées
         Retourne l'ID du groupe
+        Sans commit=True, le groupe est seulement flushé : l'appelant valide
+        la transaction une fois pour toute la requête
         """
-        group_id = str(uuid.uuid4())
+        group_id = new_transaction_group_id()
         
         transaction_group = AuditTransactionGroup(
             group_id=group_id,
@@ -50,7 +189,10 @@ class EnhancedAuditService:
         )
         
         db.add(transaction_group)
-        db.commit()
+        if commit:
+            db.commit()
+        else:
+            db.flush()
         
         return group_id
     
@@ -74,14 +216,17 @@ class EnhancedAuditService:
         endpoint: str = None,
         method: str = None,
         status_code: int = None,
-        create_backup: bool = True
+        create_backup: bool = True,
+        commit: bool = False
     ) -> AuditLogEnhanced:
         """
         Log une action avec toutes les métadonnées pour l'undo
+        Sans commit=True, les écritures sont seulement flushées : un COMMIT par
+        requête (celui de l'appelant) plutôt qu'un par action loggée
         """
         # Générer transaction_group_id si pas fourni
         if not transaction_group_id:
-            transaction_group_id = str(uuid.uuid4())
+            transaction_group_id = new_transaction_group_id()
         
         # Déterminer la complexité automatiquement si pas spécifiée
         if undo_complexity == UndoComplexity.SIMPLE:
@@ -101,7 +246,7 @@ class EnhancedAuditService:
             before_data=before_data,
             after_data=after_data,
             related_entities=related_entities,
-            is_undoable=is_undoable and action in [ActionType.CREATE, ActionType.UPDATE, ActionType.DELETE],
+            is_undoable=is_undoable and action in _UNDOABLE_ACTIONS,
             undo_complexity=undo_complexity,
             ip_address=ip_address,
             user_agent=user_agent,
@@ -113,18 +258,186 @@ class EnhancedAuditService:
         db.add(audit_log)
         db.flush()  # Pour obtenir l'ID
         
-        # Créer backup si nécessaire
-        if create_backup and audit_log.is_undoable and before_data:
-            EnhancedAuditService._create_data_backup(
-                db, audit_log, entity_type, entity_id, before_data, related_entities
-            )
+        # Créer backup si nécessaire (champs modifiés seulement pour un UPDATE)
+        if create_backup and audit_log.is_undoable:
+            backup_data = EnhancedAuditService._backup_payload(action, before_data, after_data)
+            if backup_data:
+                EnhancedAuditService._create_data_backup(
+                    db, audit_log, entity_type, entity_id, backup_data, related_entities
+                )
         
         # Mettre à jour le groupe de transaction
         EnhancedAuditService._update_transaction_group(db, transaction_group_id, audit_log)
         
-        db.commit()
+        if commit:
+            db.commit()
+        else:
+            db.flush()
         return audit_log
     
+    @staticmethod
+    def bulk_log(db: Session, records: List[Dict[str, Any]], commit: bool = False) -> List[int]:
+        """
+        Log un lot d'actions par INSERT multi-lignes, sans objet ORM par action
+        Chaque record reprend les arguments nommés de log_enhanced_action (hors db et
+        commit) ; retourne les IDs des logs créés, dans l'ordre des records
+        """
+        if not records:
+            return []
+        
+        # Même échéance pour tout le lot (connue d'avance pour les backups)
+        expires_at = datetime.utcnow() + timedelta(days=AUDIT_RETENTION_DAYS)
+        
+        rows = [EnhancedAuditService._log_row(record, expires_at) for record in records]
+        
+        # INSERT multi-lignes ; sans RETURNING ordonné (MySQL), flush groupé des objets
+        dialect = db.get_bind().dialect
+        if getattr(dialect, "insert_executemany_returning_sort_by_parameter_order", False):
+            log_ids = db.scalars(
+                insert(AuditLogEnhanced).returning(AuditLogEnhanced.id, sort_by_parameter_order=True),
+                rows
+            ).all()
+        else:
+            audit_logs = [AuditLogEnhanced(**row) for row in rows]
+            db.add_all(audit_logs)
+            db.flush()
+            log_ids = [audit_log.id for audit_log in audit_logs]
+        
+        # Backups du lot en un seul INSERT
+        backup_rows = []
+        for log_id, record, row in zip(log_ids, records, rows):
+            if not (record.get("create_backup", True) and row["is_undoable"]):
+                continue
+            backup_data = EnhancedAuditService._backup_payload(
+                row["action"], row["before_data"], row["after_data"]
+            )
+            if backup_data:
+                backup_rows.append(EnhancedAuditService._backup_row(
+                    db, log_id, row["entity_type"], row["entity_id"],
+                    backup_data, row["related_entities"], expires_at
+                ))
+        if backup_rows:
+            db.execute(insert(DataBackup), backup_rows)
+        
+        # Statistiques des groupes : deltas cumulés, un UPDATE par groupe
+        for group_id, delta in EnhancedAuditService._group_deltas(rows).items():
+            EnhancedAuditService._increment_transaction_group(db, group_id, **delta)
+        
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+        return log_ids
+    
+    @staticmethod
+    def _log_row(record: Dict[str, Any], expires_at: datetime) -> Dict[str, Any]:
+        """
+        Colonnes d'un AuditLogEnhanced à partir d'un record de bulk_log
+        """
+        action = record["action"]
+        undo_complexity = record.get("undo_complexity", UndoComplexity.SIMPLE)
+        if undo_complexity == UndoComplexity.SIMPLE:
+            undo_complexity = EnhancedAuditService._calculate_complexity(
+                action, record["entity_type"], None, None, record.get("related_entities")
+            )
+        
+        row = {field: record.get(field) for field in _AUDIT_LOG_FIELDS}
+        row.update(
+            transaction_group_id=record.get("transaction_group_id") or new_transaction_group_id(),
+            is_undoable=bool(record.get("is_undoable", True)) and action in _UNDOABLE_ACTIONS,
+            undo_complexity=undo_complexity,
+            expires_at=expires_at
+        )
+        return row
+    
+    @staticmethod
+    def _group_deltas(rows: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Statistiques à ajouter à chaque groupe de transaction pour un lot de logs
+        """
+        deltas = {}
+        for row in rows:
+            delta = deltas.setdefault(row["transaction_group_id"], {
+                "primary_user_id": row["user_id"],
+                "actions": 0,
+                "undoable_actions": 0,
+                "complexity": UndoComplexity.SIMPLE
+            })
+            delta["actions"] += 1
+            delta["undoable_actions"] += row["is_undoable"]
+            delta["complexity"] = max(delta["complexity"], row["undo_complexity"], key=_complexity_rank)
+        return deltas
+    
+    @staticmethod
+    def register_auto_audit(
+        model: type,
+        entity_type: EntityType,
+        excluded_columns: Iterable[str] = ()
+    ):
+        """
+        Déclare un modèle audité automatiquement au flush des sessions où
+        enable_auto_audit a été appelé ; `excluded_columns` (mots de passe,
+        identifiants externes...) n'apparaissent ni dans les logs ni dans les backups
+        """
+        _AUTO_AUDIT_ENTITIES[model] = (entity_type, frozenset(excluded_columns))
+    
+    @staticmethod
+    def enable_auto_audit(
+        db: Session,
+        user_id: Optional[int],
+        admin_user_id: Optional[int] = None,
+        transaction_group_id: Optional[str] = None,
+        **request_info
+    ) -> str:
+        """
+        Active l'audit automatique des modèles enregistrés pour cette session :
+        chaque flush produit les logs de ses créations, modifications et suppressions,
+        sans appel à log_enhanced_action. `request_info` reprend ip_address,
+        user_agent, endpoint, method et status_code. Retourne l'ID du groupe utilisé
+        """
+        transaction_group_id = transaction_group_id or new_transaction_group_id()
+        db.info[_AUTO_AUDIT_CONTEXT] = {
+            "user_id": user_id,
+            "admin_user_id": admin_user_id,
+            "transaction_group_id": transaction_group_id,
+            **request_info
+        }
+        return transaction_group_id
+    
+    @staticmethod
+    def disable_auto_audit(db: Session):
+        """Désactive l'audit automatique pour cette session"""
+        db.info.pop(_AUTO_AUDIT_CONTEXT, None)
+        db.info.pop(_AUTO_AUDIT_PENDING, None)
+    
+    @staticmethod
+    def _queue_flushed_logs(db: Session, records: List[Dict[str, Any]]):
+        """
+        Ajoute à la session les logs (et backups) des changements d'un flush terminé.
+        Appelé pendant le flush : aucun flush ici, les objets partent au flush suivant
+        (le commit enchaîne les flush jusqu'à ce que la session soit propre)
+        """
+        expires_at = datetime.utcnow() + timedelta(days=AUDIT_RETENTION_DAYS)
+        rows = [EnhancedAuditService._log_row(record, expires_at) for record in records]
+        
+        for row in rows:
+            audit_log = AuditLogEnhanced(**row)
+            db.add(audit_log)
+            
+            backup_data = row["is_undoable"] and EnhancedAuditService._backup_payload(
+                row["action"], row["before_data"], row["after_data"]
+            )
+            if backup_data:
+                backup = DataBackup(**EnhancedAuditService._backup_row(
+                    db, None, row["entity_type"], row["entity_id"],
+                    backup_data, row["related_entities"], expires_at
+                ))
+                backup.audit_log = audit_log
+                db.add(backup)
+        
+        for group_id, delta in EnhancedAuditService._group_deltas(rows).items():
+            EnhancedAuditService._increment_transaction_group(db, group_id, flush=False, **delta)
+    
     @staticmethod
     def _calculate_complexity(
         action: ActionType,
@@ -135,28 +448,34 @@ class EnhancedAuditService:
     ) -> UndoComplexity:
         """
         Calcule automatiquement la complexité de l'undo
+        Ne dépend que de l'action, du type d'entité et du nombre d'entités liées :
+        la décision est mémorisée sur cette clé (before/after_data non utilisés)
         """
-        # Actions non-undoables
-        if action in [ActionType.READ, ActionType.LOGIN, ActionType.LOGOUT, ActionType.ACCESS_DENIED]:
-            return UndoComplexity.IMPOSSIBLE
-        
-        # UPDATE simple sur utilisateur
-        if action == ActionType.UPDATE and entity_type == EntityType.USER:
-            return UndoComplexity.SIMPLE
-        
-        # DELETE avec beaucoup de relations
-        if action == ActionType.DELETE and related_entities and len(related_entities) > 5:
-            return UndoComplexity.COMPLEX
-        
-        # DELETE d'entités critiques
-        if action == ActionType.DELETE and entity_type in [EntityType.BUILDING, EntityType.COPRO]:
-            return UndoComplexity.COMPLEX
-        
-        # CREATE avec relations
-        if action == ActionType.CREATE and related_entities:
-            return UndoComplexity.MODERATE
-        
-        return UndoComplexity.SIMPLE
+        return _complexity_for(
+            action,
+            entity_type,
+            bool(related_entities),
+            bool(related_entities) and len(related_entities) > 5
+        )
+    
+    @staticmethod
+    def _backup_payload(
+        action: ActionType,
+        before_data: Optional[Dict[str, Any]],
+        after_data: Optional[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Données à sauvegarder pour une action (None : pas de backup)
+        Pour un UPDATE, seuls les champs modifiés (ou absents de after_data) sont
+        gardés : l'undo d'un UPDATE restaure depuis before_data du log, pas du backup
+        """
+        if action == ActionType.UPDATE and isinstance(before_data, dict) and isinstance(after_data, dict):
+            changed = {
+                key: value for key, value in before_data.items()
+                if key not in after_data or after_data[key] != value
+            }
+            return changed or None
+        return before_data or None
     
     @staticmethod
     def _create_data_backup(
@@ -170,76 +489,172 @@ class EnhancedAuditService:
         """
         Crée un backup complet des données pour restore
         """
-        backup = DataBackup(
-            audit_log_id=audit_log.id,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            full_backup_data=before_data,
-            relationships_data=related_entities,
-            backup_size_bytes=len(json.dumps(before_data).encode('utf-8')),
-            expires_at=audit_log.expires_at
-        )
+        db.add(DataBackup(**EnhancedAuditService._backup_row(
+            db, audit_log.id, entity_type, entity_id,
+            before_data, related_entities, audit_log.expires_at
+        )))
+    
+    @staticmethod
+    def _backup_row(
+        db: Session,
+        audit_log_id: int,
+        entity_type: EntityType,
+        entity_id: Optional[int],
+        before_data: Dict[str, Any],
+        related_entities: Optional[List[Dict]],
+        expires_at: datetime
+    ) -> Dict[str, Any]:
+        """
+        Colonnes d'un DataBackup (partagées par l'insertion unitaire et par lot)
+        """
+        # Une seule sérialisation (en octets UTF-8) : taille du backup et, au-delà du
+        # seuil, contenu gzippé stocké tel quel sans repasser par la colonne JSON
+        serialized = _json_bytes(before_data)
+        compressed = len(serialized) > BACKUP_COMPRESSION_THRESHOLD_BYTES
+        
+        backup = {
+            "audit_log_id": audit_log_id,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "full_backup_data": None if compressed else before_data,
+            "full_backup_data_gz": gzip.compress(serialized, compresslevel=1) if compressed else None,
+            "compression_used": compressed,
+            "relationships_data": related_entities,
+            "backup_size_bytes": len(serialized),
+            "files_backup_path": None,
+            "files_backup_status": None,
+            "expires_at": expires_at
+        }
         
-        # Backup des fichiers si nécessaire
+        # Backup des fichiers si nécessaire : la copie disque est différée au commit
+        # de l'audit (voir _dispatch_file_backups), qui renseignera chemin et statut
         if entity_type in [EntityType.PHOTO, EntityType.DOCUMENT]:
-            backup.files_backup_path = EnhancedAuditService._backup_files(
-                entity_type, entity_id, before_data
+            backup["files_backup_status"] = FileBackupStatus.PENDING
+            db.info.setdefault(_PENDING_FILE_BACKUPS, []).append(
+                (entity_type, entity_id, before_data)
             )
         
-        db.add(backup)
+        return backup
+    
+    @staticmethod
+    def _files_backup_dir(entity_type: EntityType, entity_id: int) -> Path:
+        """Dossier de backup des fichiers d'une entité"""
+        return Path(EnhancedAuditService.BACKUP_BASE_PATH) / entity_type.value / str(entity_id)
     
     @staticmethod
-    def _backup_files(entity_type: EntityType, entity_id: int, data: Dict) -> Optional[str]:
+    def _backup_files(entity_type: EntityType, entity_id: int, data: Dict):
         """
-        Sauvegarde les fichiers liés à l'entité
+        Sauvegarde les fichiers liés à l'entité puis reporte le résultat sur ses
+        backups en attente : chemin et DONE, FAILED, ou statut vidé si rien à copier
         """
         try:
             # Créer le dossier de backup
-            backup_dir = Path(EnhancedAuditService.BACKUP_BASE_PATH) / entity_type.value / str(entity_id)
+            backup_dir = EnhancedAuditService._files_backup_dir(entity_type, entity_id)
             backup_dir.mkdir(parents=True, exist_ok=True)
+            result = {"files_backup_status": None}
             
             # Sauvegarder selon le type
             if entity_type == EntityType.PHOTO and 'filename' in data:
                 source_path = Path("uploads") / data['filename']
                 if source_path.exists():
-                    shutil.copy2(source_path, backup_dir / data['filename'])
-            
-            return str(backup_dir)
+                    # copyfile : copie noyau (sendfile) sans le copystat complet de copy2 ;
+                    # seule la date de modification est reportée
+                    destination = backup_dir / data['filename']
+                    shutil.copyfile(source_path, destination)
+                    source_stat = source_path.stat()
+                    os.utime(destination, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+                    result = {
+                        "files_backup_path": str(backup_dir),
+                        "files_backup_status": FileBackupStatus.DONE
+                    }
             
-        except Exception as e:
-            print(f"Erreur backup fichiers: {e}")
-            return None
+        except Exception:
+            logger.exception("Erreur backup fichiers %s #%s", entity_type.value, entity_id)
+            result = {"files_backup_status": FileBackupStatus.FAILED}
+        
+        db = BackgroundSessionLocal()
+        try:
+            db.query(DataBackup).filter(
+                DataBackup.entity_type == entity_type,
+                DataBackup.entity_id == entity_id,
+                DataBackup.files_backup_status == FileBackupStatus.PENDING
+            ).update(result, synchronize_session=False)
+            db.commit()
+        except SQLAlchemyError:
+            db.rollback()
+            logger.exception("Statut du backup fichiers %s #%s non enregistré", entity_type.value, entity_id)
+        finally:
+            db.close()
     
     @staticmethod
-    def _update_transaction_group(db: Session, group_id: str, audit_log: AuditLogEnhanced):
+    def _increment_transaction_group(
+        db: Session,
+        group_id: str,
+        primary_user_id: Optional[int],
+        actions: int,
+        undoable_actions: int,
+        complexity: UndoComplexity,
+        flush: bool = True
+    ):
         """
-        Met à jour les statistiques du groupe de transaction
+        Ajoute des actions aux statistiques du groupe en un seul UPDATE atomique
+        (pas de lecture préalable) ; crée le groupe s'il n'existe pas encore
+        (sans flush s'il est créé depuis un événement de flush)
         """
-        group = db.query(AuditTransactionGroup).filter(
-            AuditTransactionGroup.group_id == group_id
-        ).first()
+        values = {
+            "total_actions": AuditTransactionGroup.total_actions + actions,
+            "undoable_actions": AuditTransactionGroup.undoable_actions + undoable_actions
+        }
+        if undoable_actions < actions:
+            values["all_undoable"] = False
         
-        if not group:
-            # Créer le groupe s'il n'existe pas
-            group = AuditTransactionGroup(
-                group_id=group_id,
-                group_name=f"Transaction {group_id[:8]}",
-                primary_user_id=audit_log.user_id
+        # La complexité globale ne fait que monter : SIMPLE -> MODERATE -> COMPLEX
+        if complexity == UndoComplexity.COMPLEX:
+            values["complexity_level"] = UndoComplexity.COMPLEX
+        elif complexity == UndoComplexity.MODERATE:
+            values["complexity_level"] = case(
+                (
+                    AuditTransactionGroup.complexity_level == UndoComplexity.SIMPLE,
+                    literal(UndoComplexity.MODERATE, AuditTransactionGroup.complexity_level.type)
+                ),
+                else_=AuditTransactionGroup.complexity_level
             )
-            db.add(group)
         
-        # Mettre à jour les statistiques
-        group.total_actions += 1
-        if audit_log.is_undoable:
-            group.undoable_actions += 1
-        else:
-            group.all_undoable = False
+        result = db.execute(
+            update(AuditTransactionGroup)
+            .where(AuditTransactionGroup.group_id == group_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            return
         
-        # Mettre à jour la complexité globale
-        if audit_log.undo_complexity == UndoComplexity.COMPLEX:
-            group.complexity_level = UndoComplexity.COMPLEX
-        elif audit_log.undo_complexity == UndoComplexity.MODERATE and group.complexity_level == UndoComplexity.SIMPLE:
-            group.complexity_level = UndoComplexity.MODERATE
+        # Flush immédiat : un log suivant du même groupe doit trouver la ligne
+        db.add(AuditTransactionGroup(
+            group_id=group_id,
+            group_name=f"Transaction {group_id[-8:]}",  # fin aléatoire (le début UUIDv7 est horodaté)
+            primary_user_id=primary_user_id,
+            total_actions=actions,
+            undoable_actions=undoable_actions,
+            all_undoable=undoable_actions == actions,
+            complexity_level=max(UndoComplexity.SIMPLE, complexity, key=_complexity_rank)
+        ))
+        if flush:
+            db.flush()
+    
+    @staticmethod
+    def _update_transaction_group(db: Session, group_id: str, audit_log: AuditLogEnhanced):
+        """
+        Met à jour les statistiques du groupe de transaction
+        """
+        EnhancedAuditService._increment_transaction_group(
+            db,
+            group_id,
+            primary_user_id=audit_log.user_id,
+            actions=1,
+            undoable_actions=1 if audit_log.is_undoable else 0,
+            complexity=audit_log.undo_complexity
+        )
     
     @staticmethod
     def get_user_audit_timeline(
@@ -247,41 +662,137 @@ class EnhancedAuditService:
         user_id: int,
         days: int = 7,
         include_non_undoable: bool = True,
-        admin_role: Optional[AdminRole] = None
+        admin_role: Optional[AdminRole] = None,
+        max_groups: Optional[int] = None,
+        before: Optional[Tuple[datetime, str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Récupère la timeline d'audit d'un utilisateur avec groupement
+        Les groupes (date, complexité, nombre d'undo) sont agrégés en SQL ; seuls
+        les logs des `max_groups` groupes les plus récents sont ensuite chargés.
+        Pagination par clé : `before` = (created_at, group_id) du dernier groupe de
+        la page précédente
         """
         # Date limite
         since_date = datetime.utcnow() - timedelta(days=days)
         
-        # Requête de base
-        query = db.query(AuditLogEnhanced).filter(
+        filters = [
             AuditLogEnhanced.user_id == user_id,
             AuditLogEnhanced.created_at >= since_date
+        ]
+        if not include_non_undoable:
+            filters.append(AuditLogEnhanced.is_undoable == True)
+        
+        # En-têtes de groupes : GROUP BY transaction_group_id, plus récent d'abord
+        # (la complexité du groupe est la plus élevée de ses actions ; le nom vient
+        # du LEFT JOIN sur le groupe, un groupe au plus par log)
+        complexity_rank = case(
+            *(
+                (AuditLogEnhanced.undo_complexity == complexity, complexity.rank)
+                for complexity in (UndoComplexity.COMPLEX, UndoComplexity.MODERATE)
+            ),
+            else_=0
         )
+        last_action_at = func.max(AuditLogEnhanced.created_at).label("created_at")
+        groups_query = db.query(
+            AuditLogEnhanced.transaction_group_id,
+            AuditTransactionGroup.group_name,
+            last_action_at,
+            func.max(complexity_rank).label("complexity_rank"),
+            func.count(UndoAction.id).label("undo_count")
+        ).outerjoin(
+            AuditTransactionGroup,
+            AuditTransactionGroup.group_id == AuditLogEnhanced.transaction_group_id
+        ).outerjoin(
+            UndoAction, UndoAction.audit_log_id == AuditLogEnhanced.id
+        ).filter(*filters).group_by(
+            AuditLogEnhanced.transaction_group_id,
+            AuditTransactionGroup.group_name
+        ).order_by(desc(last_action_at), desc(AuditLogEnhanced.transaction_group_id))
+        if before:
+            groups_query = groups_query.having(
+                tuple_(func.max(AuditLogEnhanced.created_at), AuditLogEnhanced.transaction_group_id)
+                < tuple_(literal(before[0]), literal(before[1]))
+            )
+        if max_groups:
+            groups_query = groups_query.limit(max_groups)
         
-        if not include_non_undoable:
-            query = query.filter(AuditLogEnhanced.is_undoable == True)
+        grouped_actions = {
+            group.transaction_group_id: {
+                "group_id": group.transaction_group_id,
+                "group_name": group.group_name,
+                "actions": [],
+                "complexity": _COMPLEXITY_BY_RANK[group.complexity_rank or 0],
+                "can_undo": True,
+                "undo_count": group.undo_count,
+                "created_at": group.created_at
+            }
+            for group in groups_query.all()
+        }
+        if not grouped_actions:
+            return []
+        
+        group_filter = AuditLogEnhanced.transaction_group_id.in_(list(grouped_actions))
+        
+        # Undo effectués sur ces logs, avec l'email de l'admin, en une requête
+        # (lue avant le curseur des logs, qui occupe la connexion pendant le parcours)
+        undo_actions_by_log = {}
+        undo_rows = db.query(
+            UndoAction.audit_log_id,
+            UndoAction.id,
+            UndoAction.status,
+            UndoAction.created_at,
+            UserAuth.email
+        ).join(
+            AuditLogEnhanced, AuditLogEnhanced.id == UndoAction.audit_log_id
+        ).outerjoin(
+            AdminUser, AdminUser.id == UndoAction.performed_by_admin_id
+        ).outerjoin(
+            UserAuth, UserAuth.id == AdminUser.user_id
+        ).filter(*filters, group_filter).order_by(UndoAction.id)
+        for audit_log_id, undo_id, status, performed_at, admin_email in undo_rows:
+            undo_actions_by_log.setdefault(audit_log_id, []).append({
+                "id": undo_id,
+                "status": status,
+                "performed_at": performed_at,
+                "performed_by": admin_email or "Unknown"
+            })
         
-        audit_logs = query.order_by(desc(AuditLogEnhanced.created_at)).all()
+        # Détail des actions des groupes retenus, en colonnes (pas d'objets ORM instrumentés),
+        # lu par lots sur un curseur serveur : mémoire constante quel que soit le volume
+        audit_logs = db.query(
+            AuditLogEnhanced.id,
+            AuditLogEnhanced.action,
+            AuditLogEnhanced.entity_type,
+            AuditLogEnhanced.entity_id,
+            AuditLogEnhanced.description,
+            AuditLogEnhanced.created_at,
+            AuditLogEnhanced.is_undoable,
+            AuditLogEnhanced.undo_complexity,
+            AuditLogEnhanced.transaction_group_id,
+            AuditLogEnhanced.expires_at,
+            AuditLogEnhanced.related_entities
+        ).filter(*filters, group_filter).order_by(
+            desc(AuditLogEnhanced.created_at)
+        ).yield_per(500)
         
-        # Grouper par transaction_group_id
-        grouped_actions = {}
+        now = datetime.utcnow()
         for log in audit_logs:
-            group_id = log.transaction_group_id
-            if group_id not in grouped_actions:
-                grouped_actions[group_id] = {
-                    "group_id": group_id,
-                    "group_name": None,
-                    "actions": [],
-                    "complexity": UndoComplexity.SIMPLE,
-                    "can_undo": True,
-                    "undo_count": 0,
-                    "created_at": log.created_at
-                }
+            group = grouped_actions[log.transaction_group_id]
+            undo_actions = undo_actions_by_log.get(log.id, [])
             
-            action_data = {
+            # Mêmes règles que AuditLogEnhanced.is_still_undoable / can_be_undone_by_role,
+            # appliquées à la ligne (les deux méthodes ne lisent que des colonnes présentes)
+            still_undoable = bool(
+                log.is_undoable
+                and now <= log.expires_at
+                and not any(undo["status"] == UndoStatus.COMPLETED for undo in undo_actions)
+            )
+            undoable_by_role = (
+                AuditLogEnhanced.can_be_undone_by_role(log, admin_role) if admin_role else False
+            )
+            
+            group["actions"].append({
                 "id": log.id,
                 "action": log.action,
                 "entity_type": log.entity_type,
@@ -290,50 +801,18 @@ class EnhancedAuditService:
                 "created_at": log.created_at,
                 "is_undoable": log.is_undoable,
                 "undo_complexity": log.undo_complexity,
-                "can_undo_by_role": log.can_be_undone_by_role(admin_role) if admin_role else False,
-                "is_still_undoable": log.is_still_undoable(),
-                "impact_preview": log.get_impact_preview(),
-                "undo_actions": [
-                    {
-                        "id": undo.id,
-                        "status": undo.status,
-                        "performed_at": undo.created_at,
-                        "performed_by": undo.performed_by_admin.user.email if undo.performed_by_admin and undo.performed_by_admin.user else "Unknown"
-                    }
-                    for undo in log.undo_actions
-                ]
-            }
-            
-            grouped_actions[group_id]["actions"].append(action_data)
-            
-            # Mettre à jour la complexité du groupe
-            if log.undo_complexity == UndoComplexity.COMPLEX:
-                grouped_actions[group_id]["complexity"] = UndoComplexity.COMPLEX
-            elif log.undo_complexity == UndoComplexity.MODERATE and grouped_actions[group_id]["complexity"] == UndoComplexity.SIMPLE:
-                grouped_actions[group_id]["complexity"] = UndoComplexity.MODERATE
+                "can_undo_by_role": undoable_by_role,
+                "is_still_undoable": still_undoable,
+                "impact_preview": AuditLogEnhanced.get_impact_preview(log),
+                "undo_actions": undo_actions
+            })
             
             # Vérifier si peut être undo
-            if not log.is_still_undoable() or (admin_role and not log.can_be_undone_by_role(admin_role)):
-                grouped_actions[group_id]["can_undo"] = False
-            
-            # Compter les undo déjà effectués
-            grouped_actions[group_id]["undo_count"] += len(log.undo_actions)
-        
-        # Récupérer les noms des groupes
-        group_ids = list(grouped_actions.keys())
-        transaction_groups = db.query(AuditTransactionGroup).filter(
-            AuditTransactionGroup.group_id.in_(group_ids)
-        ).all()
-        
-        for tg in transaction_groups:
-            if tg.group_id in grouped_actions:
-                grouped_actions[tg.group_id]["group_name"] = tg.group_name
+            if not still_undoable or (admin_role and not undoable_by_role):
+                group["can_undo"] = False
         
-        # Convertir en liste et trier par date
-        timeline = list(grouped_actions.values())
-        timeline.sort(key=lambda x: x["created_at"], reverse=True)
-        
-        return timeline
+        # Déjà triée par date (ordre de la requête d'agrégation)
+        return list(grouped_actions.values())
     
     @staticmethod
     def get_undo_requirements(db: Session, audit_log_id: int) -> Dict[str, Any]:
@@ -356,49 +835,93 @@ class EnhancedAuditService:
             "blockers": []
         }
         
-        # Vérifications selon le type d'action
+        # Vérifications selon le type d'action (sondes évaluées en une seule requête)
+        probes = EnhancedAuditService._undo_probes(db, audit_log)
         if audit_log.action == ActionType.DELETE:
             requirements = EnhancedAuditService._check_delete_undo_requirements(
-                db, audit_log, requirements
+                audit_log, requirements, probes
             )
         elif audit_log.action == ActionType.CREATE:
             requirements = EnhancedAuditService._check_create_undo_requirements(
-                db, audit_log, requirements
+                audit_log, requirements, probes
             )
         elif audit_log.action == ActionType.UPDATE:
             requirements = EnhancedAuditService._check_update_undo_requirements(
-                db, audit_log, requirements
+                audit_log, requirements, probes
             )
         
         return requirements
     
+    @staticmethod
+    def _undo_probes(db: Session, audit_log: AuditLogEnhanced) -> Dict[str, Any]:
+        """
+        Évalue en un seul SELECT les sondes utiles aux pré-requis de l'action :
+        existence de l'entité, backups disponibles, modifications ultérieures
+        """
+        probes = {}
+        
+        # Existence de l'entité (TODO: autres types que USER)
+        if (audit_log.entity_id and audit_log.entity_type == EntityType.USER
+                and audit_log.action in (ActionType.CREATE, ActionType.DELETE)):
+            probes["entity_exists"] = db.query(UserAuth.id).filter(
+                UserAuth.id == audit_log.entity_id
+            ).exists()
+        
+        # Backups de données et de fichiers
+        if audit_log.action == ActionType.DELETE:
+            backups = db.query(DataBackup.id).filter(DataBackup.audit_log_id == audit_log.id)
+            probes["has_backup"] = backups.exists()
+            probes["has_files_backup"] = backups.filter(
+                DataBackup.files_backup_path.isnot(None)
+            ).exists()
+        
+        # Modifications ultérieures de la même entité
+        later_actions = None
+        if audit_log.action == ActionType.CREATE:
+            later_actions = [ActionType.CREATE, ActionType.UPDATE]
+        elif audit_log.action == ActionType.UPDATE and audit_log.entity_id:
+            later_actions = [ActionType.UPDATE]
+        if later_actions:
+            # Comptage borné : le parcours s'arrête à LATER_MODIFICATIONS_CAP + 1 lignes
+            later_logs = db.query(AuditLogEnhanced.id).filter(
+                AuditLogEnhanced.entity_type == audit_log.entity_type,
+                AuditLogEnhanced.entity_id == audit_log.entity_id,
+                AuditLogEnhanced.created_at > audit_log.created_at,
+                AuditLogEnhanced.action.in_(later_actions)
+            ).limit(LATER_MODIFICATIONS_CAP + 1).subquery()
+            probes["later_modifications"] = db.query(func.count()).select_from(
+                later_logs
+            ).scalar_subquery()
+        
+        if not probes:
+            return {}
+        
+        row = db.query(*(probe.label(name) for name, probe in probes.items())).one()
+        # EXISTS revient en 0/1 sous MySQL
+        return {
+            name: value if name == "later_modifications" else bool(value)
+            for name, value in row._asdict().items()
+        }
+    
     @staticmethod
     def _check_delete_undo_requirements(
-        db: Session, 
         audit_log: AuditLogEnhanced, 
-        requirements: Dict
+        requirements: Dict,
+        probes: Dict[str, Any]
     ) -> Dict:
         """
         Vérifie les pré-requis pour undo d'une suppression
         """
         # Vérifier que l'entité n'a pas été recréée
-        if audit_log.entity_id:
-            # TODO: Vérifier selon entity_type
-            if audit_log.entity_type == EntityType.USER:
-                existing = db.query(UserAuth).filter(UserAuth.id == audit_log.entity_id).first()
-                if existing:
-                    requirements["blockers"].append(
-                        f"Un utilisateur avec l'ID {audit_log.entity_id} existe déjà"
-                    )
+        if probes.get("entity_exists"):
+            requirements["blockers"].append(
+                f"Un utilisateur avec l'ID {audit_log.entity_id} existe déjà"
+            )
         
         # Vérifier les backups
-        backup = db.query(DataBackup).filter(
-            DataBackup.audit_log_id == audit_log.id
-        ).first()
-        
-        if backup:
+        if probes["has_backup"]:
             requirements["requirements"].append("Backup de données disponible")
-            if backup.files_backup_path:
+            if probes["has_files_backup"]:
                 requirements["requirements"].append("Backup de fichiers disponible")
         else:
             requirements["blockers"].append("Aucun backup disponible pour la restauration")
@@ -407,64 +930,115 @@ class EnhancedAuditService:
     
     @staticmethod
     def _check_create_undo_requirements(
-        db: Session, 
         audit_log: AuditLogEnhanced, 
-        requirements: Dict
+        requirements: Dict,
+        probes: Dict[str, Any]
     ) -> Dict:
         """
         Vérifie les pré-requis pour undo d'une création
         """
         # Vérifier que l'entité existe encore
-        if audit_log.entity_id:
-            # TODO: Vérifier selon entity_type
-            if audit_log.entity_type == EntityType.USER:
-                existing = db.query(UserAuth).filter(UserAuth.id == audit_log.entity_id).first()
-                if not existing:
-                    requirements["blockers"].append(
-                        f"L'utilisateur {audit_log.entity_id} n'existe plus"
-                    )
-        
-        # Vérifier les dépendances créées après
-        related_audits = db.query(AuditLogEnhanced).filter(
-            and_(
-                AuditLogEnhanced.entity_type == audit_log.entity_type,
-                AuditLogEnhanced.entity_id == audit_log.entity_id,
-                AuditLogEnhanced.created_at > audit_log.created_at,
-                AuditLogEnhanced.action.in_([ActionType.CREATE, ActionType.UPDATE])
+        if "entity_exists" in probes and not probes["entity_exists"]:
+            requirements["blockers"].append(
+                f"L'utilisateur {audit_log.entity_id} n'existe plus"
             )
-        ).count()
         
+        # Vérifier les dépendances créées après
+        related_audits = probes["later_modifications"]
         if related_audits > 0:
             requirements["warnings"].append(
-                f"{related_audits} modification(s) effectuée(s) depuis la création"
+                f"{_capped_count(related_audits)} modification(s) effectuée(s) depuis la création"
             )
         
         return requirements
     
     @staticmethod
     def _check_update_undo_requirements(
-        db: Session, 
         audit_log: AuditLogEnhanced, 
-        requirements: Dict
+        requirements: Dict,
+        probes: Dict[str, Any]
     ) -> Dict:
         """
         Vérifie les pré-requis pour undo d'une mise à jour
         """
-        # Vérifier que l'entité existe encore et n'a pas été modifiée depuis
-        if audit_log.entity_id:
-            # Chercher des modifications ultérieures
-            later_updates = db.query(AuditLogEnhanced).filter(
-                and_(
-                    AuditLogEnhanced.entity_type == audit_log.entity_type,
-                    AuditLogEnhanced.entity_id == audit_log.entity_id,
-                    AuditLogEnhanced.created_at > audit_log.created_at,
-                    AuditLogEnhanced.action == ActionType.UPDATE
-                )
-            ).count()
-            
-            if later_updates > 0:
-                requirements["warnings"].append(
-                    f"L'entité a été modifiée {later_updates} fois depuis cette action"
-                )
+        # Vérifier que l'entité n'a pas été modifiée depuis
+        later_updates = probes.get("later_modifications", 0)
+        if later_updates > 0:
+            requirements["warnings"].append(
+                f"L'entité a été modifiée {_capped_count(later_updates)} fois depuis cette action"
+            )
         
-        return requirements
\ No newline at end of file
+        return requirements
+
+
+# Seul modèle audité d'office (les autres s'enregistrent via register_auto_audit),
+# sans ses identifiants de connexion
+EnhancedAuditService.register_auto_audit(
+    UserAuth, EntityType.USER, excluded_columns=("hashed_password", "oauth_provider_id")
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_file_backups(session):
+    """Lance en arrière-plan les copies de fichiers des backups qui viennent d'être validés"""
+    for entity_type, entity_id, data in session.info.pop(_PENDING_FILE_BACKUPS, ()):
+        _file_backup_executor.submit(EnhancedAuditService._backup_files, entity_type, entity_id, data)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_file_backups(session):
+    """Abandonne les copies de fichiers des backups annulés"""
+    session.info.pop(_PENDING_FILE_BACKUPS, None)
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_audited_changes(session, flush_context, instances):
+    """Relève les changements des modèles audités (état d'origine encore disponible)"""
+    if _AUTO_AUDIT_CONTEXT not in session.info or not _AUTO_AUDIT_ENTITIES:
+        return
+    
+    pending = session.info.setdefault(_AUTO_AUDIT_PENDING, [])
+    for action, objects in (
+        (ActionType.CREATE, session.new),
+        (ActionType.UPDATE, session.dirty),
+        (ActionType.DELETE, session.deleted)
+    ):
+        for obj in objects:
+            audited = _AUTO_AUDIT_ENTITIES.get(type(obj))
+            if audited is None:
+                continue
+            if action == ActionType.UPDATE and not session.is_modified(obj, include_collections=False):
+                continue
+            entity_type, excluded_columns = audited
+            state = inspect(obj)
+            before_data = (
+                None if action == ActionType.CREATE
+                else _state_snapshot(state, before=True, excluded_columns=excluded_columns)
+            )
+            pending.append((action, entity_type, excluded_columns, state, before_data))
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _log_audited_changes(session, flush_context):
+    """Crée les logs des changements relevés, une fois les IDs des créations connus"""
+    pending = session.info.pop(_AUTO_AUDIT_PENDING, None)
+    context = session.info.get(_AUTO_AUDIT_CONTEXT)
+    if not pending or not context:
+        return
+    
+    records = []
+    for action, entity_type, excluded_columns, state, before_data in pending:
+        entity_id = state.identity[0] if state.identity else None
+        records.append({
+            **context,
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "description": f"{_AUTO_AUDIT_LABELS[action]} {entity_type.value.lower()} #{entity_id}",
+            "before_data": before_data,
+            "after_data": (
+                None if action == ActionType.DELETE
+                else _state_snapshot(state, before=False, excluded_columns=excluded_columns)
+            )
+        })
+    EnhancedAuditService._queue_flushed_logs(session, records)
@@ -2,13 +2,15 @@
 Service de gestion de la multipropriété
 Gestion des groupes, quotas et permissions avec sponsor Premium
 """
-from typing import List, Dict, Any, Optional, Tuple
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
-from datetime import datetime, timedelta
-import uuid
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+from sqlalchemy.orm import Session, contains_eager
+from sqlalchemy import and_, or_, func, literal, null
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from datetime import datetime, timedelta, timezone
+import secrets
+import string
 
-from models import UserAuth, Apartment, ApartmentUserLink
+from models import UserAuth, Apartment, ApartmentUserLink, Building
 from models_multipropriete import (
     PropertyGroup, PropertyGroupMember, PropertyGroupInvitation,
     PropertyGroupStatus, MembershipStatus, PropertyGroupType
@@ -19,6 +21,15 @@ from error_handlers import BusinessLogicErrorHandler, PermissionErrorHandler
 from constants import FREE_SUBSCRIPTION_LIMITS
 
 
+# Codes d'invitation : 12 caractères A-Z0-9 tirés par secrets (~62 bits d'entropie)
+INVITATION_CODE_LENGTH = 12
+_INVITATION_CODE_ALPHABET = string.ascii_uppercase + string.digits
+
+# Quotas déjà calculés pendant la session (requête) : db.info[_QUOTA_CACHE][user_id]
+_QUOTA_CACHE = "multipropriete_quota_cache"
+_PREMIUM_CACHE = "multipropriete_premium_cache"
+
+
 class MultiproprieteDashboard:
     """Données du tableau de bord multipropriété"""
     
@@ -64,47 +75,159 @@ class MultiproprietService:
     def get_user_apartment_quotas(db: Session, user_id: int) -> Dict[str, Any]:
         """
         Calcule les quotas d'appartements pour un utilisateur avec multipropriété
+        Mémorisé dans la session jusqu'à la prochaine écriture de ce service
         """
-        user = db.query(UserAuth).filter(UserAuth.id == user_id).first()
-        if not user:
-            raise ValueError("Utilisateur non trouvé")
+        cache = db.info.setdefault(_QUOTA_CACHE, {})
+        if user_id in cache:
+            return cache[user_id]
         
         # Vérifier le type d'abonnement
-        subscription = SubscriptionService.get_user_subscription(db, user_id)
-        is_premium = subscription.get("type") == SubscriptionType.PREMIUM
+        is_premium = MultiproprietService._is_premium(db, user_id)
         
-        # Compter les appartements personnels (hors groupes)
-        personal_apartments = db.query(func.count(ApartmentUserLink.apartment_id)).join(
-            Apartment, ApartmentUserLink.apartment_id == Apartment.id
-        ).filter(
-            ApartmentUserLink.user_id == user_id,
-            ApartmentUserLink.role == UserRole.owner,
-            Apartment.property_group_id.is_(None)  # Pas dans un groupe
-        ).scalar() or 0
+        # Existence de l'utilisateur et compteurs en un seul SELECT de sous-requêtes
+        probes = {
+            "user_exists": db.query(UserAuth.id).filter(UserAuth.id == user_id).exists(),
+            
+            # Appartements personnels (hors groupes)
+            "personal_apartments": db.query(func.count(ApartmentUserLink.apartment_id)).join(
+                Apartment, ApartmentUserLink.apartment_id == Apartment.id
+            ).filter(
+                ApartmentUserLink.user_id == user_id,
+                ApartmentUserLink.role == UserRole.owner,
+                Apartment.property_group_id.is_(None)  # Pas dans un groupe
+            ).scalar_subquery(),
+            
+            # Appartements accessibles via memberships
+            "accessible_via_groups": db.query(func.count(Apartment.id)).join(
+                PropertyGroup, Apartment.property_group_id == PropertyGroup.id
+            ).join(
+                PropertyGroupMember, PropertyGroup.id == PropertyGroupMember.group_id
+            ).filter(
+                PropertyGroupMember.user_id == user_id,
+                PropertyGroupMember.membership_status == MembershipStatus.ACTIVE,
+                PropertyGroup.group_status == PropertyGroupStatus.ACTIVE,
+                PropertyGroup.sponsor_id != user_id  # Pas ses propres groupes
+            ).scalar_subquery()
+        }
         
-        # Compter les appartements sponsorisés (dans ses groupes)
-        sponsored_apartments = 0
+        # Appartements sponsorisés (dans ses groupes), uniquement pour les Premium
         if is_premium:
-            sponsored_apartments = db.query(func.count(Apartment.id)).join(
+            probes["sponsored_apartments"] = db.query(func.count(Apartment.id)).join(
                 PropertyGroup, Apartment.property_group_id == PropertyGroup.id
             ).filter(
                 PropertyGroup.sponsor_id == user_id,
                 PropertyGroup.group_status == PropertyGroupStatus.ACTIVE
-            ).scalar() or 0
+            ).scalar_subquery()
         
-        # Compter les appartements accessibles via memberships
-        accessible_via_groups = db.query(func.count(Apartment.id)).join(
-            PropertyGroup, Apartment.property_group_id == PropertyGroup.id
+        counts = db.query(*(probe.label(name) for name, probe in probes.items())).one()._asdict()
+        if not counts["user_exists"]:
+            raise ValueError("Utilisateur non trouvé")
+        
+        personal_apartments = counts["personal_apartments"] or 0
+        sponsored_apartments = counts.get("sponsored_apartments") or 0
+        accessible_via_groups = counts["accessible_via_groups"] or 0
+        
+        quotas = MultiproprietService._build_quotas(
+            personal_apartments, sponsored_apartments, accessible_via_groups, is_premium
+        )
+        cache[user_id] = quotas
+        return quotas
+    
+    @staticmethod
+    def _is_premium(db: Session, user_id: int) -> bool:
+        """
+        Abonnement Premium actif, lu une fois par session (requête) puis mémorisé
+        """
+        cache = db.info.setdefault(_PREMIUM_CACHE, {})
+        if user_id not in cache:
+            subscription = SubscriptionService.get_user_subscription(db, user_id)
+            cache[user_id] = subscription.get("type") == SubscriptionType.PREMIUM
+        return cache[user_id]
+    
+    @staticmethod
+    def _invalidate_quotas(db: Session):
+        """
+        Oublie les quotas mémorisés dans la session : une écriture sur un groupe
+        change aussi les compteurs de ses autres membres
+        """
+        db.info.pop(_QUOTA_CACHE, None)
+    
+    @staticmethod
+    def get_user_apartment_quotas_bulk(
+        db: Session,
+        user_ids: Iterable[int],
+        subscriptions: Optional[Dict[int, Dict[str, Any]]] = None
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Calcule les quotas de plusieurs utilisateurs avec une requête groupée par compteur
+        Retourne un dict user_id -> même format que get_user_apartment_quotas
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+        
+        if subscriptions is None:
+            subscriptions = SubscriptionService.get_user_subscriptions_bulk(db, user_ids)
+        premium_ids = [
+            user_id for user_id in user_ids
+            if subscriptions[user_id].get("type") == SubscriptionType.PREMIUM
+        ]
+        
+        # Appartements personnels (hors groupes)
+        personal_counts = dict(db.query(
+            ApartmentUserLink.user_id, func.count(ApartmentUserLink.apartment_id)
         ).join(
-            PropertyGroupMember, PropertyGroup.id == PropertyGroupMember.group_id
+            Apartment, ApartmentUserLink.apartment_id == Apartment.id
         ).filter(
-            PropertyGroupMember.user_id == user_id,
+            ApartmentUserLink.user_id.in_(user_ids),
+            ApartmentUserLink.role == UserRole.owner,
+            Apartment.property_group_id.is_(None)
+        ).group_by(ApartmentUserLink.user_id).all())
+        
+        # Appartements sponsorisés (uniquement pour les Premium)
+        sponsored_counts = {}
+        if premium_ids:
+            sponsored_counts = dict(db.query(
+                PropertyGroup.sponsor_id, func.count(Apartment.id)
+            ).join(
+                Apartment, Apartment.property_group_id == PropertyGroup.id
+            ).filter(
+                PropertyGroup.sponsor_id.in_(premium_ids),
+                PropertyGroup.group_status == PropertyGroupStatus.ACTIVE
+            ).group_by(PropertyGroup.sponsor_id).all())
+        
+        # Appartements accessibles via memberships (hors groupes sponsorisés par l'utilisateur)
+        accessible_counts = dict(db.query(
+            PropertyGroupMember.user_id, func.count(Apartment.id)
+        ).join(
+            PropertyGroup, PropertyGroup.id == PropertyGroupMember.group_id
+        ).join(
+            Apartment, Apartment.property_group_id == PropertyGroup.id
+        ).filter(
+            PropertyGroupMember.user_id.in_(user_ids),
             PropertyGroupMember.membership_status == MembershipStatus.ACTIVE,
             PropertyGroup.group_status == PropertyGroupStatus.ACTIVE,
-            PropertyGroup.sponsor_id != user_id  # Pas ses propres groupes
-        ).scalar() or 0
+            PropertyGroup.sponsor_id != PropertyGroupMember.user_id
+        ).group_by(PropertyGroupMember.user_id).all())
         
-        # Calculer les limites
+        return {
+            user_id: MultiproprietService._build_quotas(
+                personal_counts.get(user_id, 0),
+                sponsored_counts.get(user_id, 0),
+                accessible_counts.get(user_id, 0),
+                subscriptions[user_id].get("type") == SubscriptionType.PREMIUM
+            )
+            for user_id in user_ids
+        }
+    
+    @staticmethod
+    def _build_quotas(
+        personal_apartments: int,
+        sponsored_apartments: int,
+        accessible_via_groups: int,
+        is_premium: bool
+    ) -> Dict[str, Any]:
+        """Calcule les limites et assemble le dict de quotas"""
         if is_premium:
             personal_quota = -1  # Illimité
             sponsored_quota = -1  # Illimité
@@ -130,22 +253,38 @@ class MultiproprietService:
         Vérifie si un utilisateur peut ajouter un appartement
         apartment_type: "personal" ou "sponsored"
         """
-        quotas = MultiproprietService.get_user_apartment_quotas(db, user_id)
+        if apartment_type not in ("personal", "sponsored"):
+            return False, "Type d'appartement invalide"
         
-        if apartment_type == "personal":
-            if quotas["can_add_personal"]:
-                return True, "OK"
-            else:
-                remaining = quotas["personal_quota"] - quotas["personal_apartments"]
-                return False, f"Limite d'appartements personnels atteinte ({quotas['personal_apartments']}/{quotas['personal_quota']})"
+        # Quotas déjà calculés dans la session : aucune requête pour le compteur
+        quotas = db.info.get(_QUOTA_CACHE, {}).get(user_id)
+        is_premium = MultiproprietService._is_premium(db, user_id)
         
-        elif apartment_type == "sponsored":
-            if quotas["can_sponsor_groups"]:
+        if apartment_type == "sponsored":
+            if is_premium:
                 return True, "OK"
-            else:
-                return False, "Abonnement Premium requis pour sponsoriser des groupes"
+            return False, "Abonnement Premium requis pour sponsoriser des groupes"
         
-        return False, "Type d'appartement invalide"
+        # Personnel : illimité en Premium, sinon seul le compteur personnel est utile
+        if is_premium:
+            return True, "OK"
+        
+        personal_quota = FREE_SUBSCRIPTION_LIMITS["max_apartments"]
+        if quotas:
+            personal_apartments = quotas["personal_apartments"]
+        else:
+            # Comptage borné : au-delà du quota, le nombre exact ne change pas la réponse
+            personal_apartments = db.query(ApartmentUserLink.apartment_id).join(
+                Apartment, ApartmentUserLink.apartment_id == Apartment.id
+            ).filter(
+                ApartmentUserLink.user_id == user_id,
+                ApartmentUserLink.role == UserRole.owner,
+                Apartment.property_group_id.is_(None)
+            ).limit(personal_quota + 1).count()
+        
+        if personal_apartments < personal_quota:
+            return True, "OK"
+        return False, f"Limite d'appartements personnels atteinte ({personal_apartments}/{personal_quota})"
     
     @staticmethod
     def create_property_group(
@@ -174,9 +313,9 @@ class MultiproprietService:
             group_status=PropertyGroupStatus.ACTIVE
         )
         
+        # Flush pour obtenir l'ID ; groupe et membership sponsor validés ensemble
         db.add(group)
-        db.commit()
-        db.refresh(group)
+        db.flush()
         
         # Ajouter le sponsor comme membre administrateur
         sponsor_member = PropertyGroupMember(
@@ -187,12 +326,14 @@ class MultiproprietService:
             can_invite_members=True,
             can_manage_apartments=True,
             can_view_finances=True,
-            joined_at=datetime.utcnow()
+            joined_at=func.now()
         )
         
         db.add(sponsor_member)
         db.commit()
+        MultiproprietService._invalidate_quotas(db)
         
+        # Pas de refresh : l'instance expirée au commit se recharge au premier accès
         return group
     
     @staticmethod
@@ -207,36 +348,45 @@ class MultiproprietService:
         """
         Invite un utilisateur à rejoindre un groupe de multipropriété
         """
-        # Vérifier que le groupe existe et est actif
-        group = db.query(PropertyGroup).filter(
+        # Groupe actif, membership de l'inviteur et nombre de membres actifs en une requête
+        active_members_count = db.query(func.count(PropertyGroupMember.id)).filter(
+            PropertyGroupMember.group_id == group_id,
+            PropertyGroupMember.membership_status == MembershipStatus.ACTIVE
+        ).scalar_subquery()
+        
+        group_row = db.query(
+            PropertyGroup, PropertyGroupMember, active_members_count
+        ).outerjoin(
+            PropertyGroupMember, and_(
+                PropertyGroupMember.group_id == PropertyGroup.id,
+                PropertyGroupMember.user_id == invited_by_id,
+                PropertyGroupMember.membership_status == MembershipStatus.ACTIVE
+            )
+        ).filter(
             PropertyGroup.id == group_id,
             PropertyGroup.group_status == PropertyGroupStatus.ACTIVE
         ).first()
         
-        if not group:
+        if not group_row:
             raise ValueError("Groupe non trouvé ou inactif")
+        group, inviter_member, active_members_count = group_row
         
         # Vérifier que l'inviteur a les permissions
-        inviter_member = db.query(PropertyGroupMember).filter(
-            PropertyGroupMember.group_id == group_id,
-            PropertyGroupMember.user_id == invited_by_id,
-            PropertyGroupMember.membership_status == MembershipStatus.ACTIVE
-        ).first()
-        
         if not inviter_member or not inviter_member.can_invite_members:
             raise PermissionErrorHandler.access_denied("Vous n'avez pas les permissions pour inviter des membres")
         
-        # Trouver l'utilisateur à inviter
-        invited_user = db.query(UserAuth).filter(UserAuth.email == invited_user_email).first()
-        if not invited_user:
+        # Utilisateur à inviter et son éventuel membership dans le groupe
+        invited_row = db.query(UserAuth, PropertyGroupMember).outerjoin(
+            PropertyGroupMember, and_(
+                PropertyGroupMember.user_id == UserAuth.id,
+                PropertyGroupMember.group_id == group_id
+            )
+        ).filter(UserAuth.email == invited_user_email).first()
+        if not invited_row:
             raise ValueError(f"Utilisateur {invited_user_email} non trouvé")
+        invited_user, existing_member = invited_row
         
         # Vérifier qu'il n'est pas déjà membre
-        existing_member = db.query(PropertyGroupMember).filter(
-            PropertyGroupMember.group_id == group_id,
-            PropertyGroupMember.user_id == invited_user.id
-        ).first()
-        
         if existing_member:
             if existing_member.membership_status == MembershipStatus.ACTIVE:
                 raise ValueError("L'utilisateur est déjà membre du groupe")
@@ -244,19 +394,17 @@ class MultiproprietService:
                 raise ValueError("Une invitation est déjà en attente pour cet utilisateur")
         
         # Vérifier la limite de membres
-        active_members_count = db.query(func.count(PropertyGroupMember.id)).filter(
-            PropertyGroupMember.group_id == group_id,
-            PropertyGroupMember.membership_status == MembershipStatus.ACTIVE
-        ).scalar()
-        
         if active_members_count >= group.max_members:
             raise BusinessLogicErrorHandler.subscription_limit_exceeded(
                 active_members_count, group.max_members, "membres dans le groupe"
             )
         
         # Créer l'invitation
-        invitation_code = str(uuid.uuid4())[:8].upper()
-        expires_at = datetime.utcnow() + timedelta(days=expires_in_days)
+        invitation_code = ''.join(
+            secrets.choice(_INVITATION_CODE_ALPHABET) for _ in range(INVITATION_CODE_LENGTH)
+        )
+        # Calculée en Python (UTC naïf) : comparée à l'heure Python dans is_expired
+        expires_at = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=expires_in_days)
         
         invitation = PropertyGroupInvitation(
             group_id=group_id,
@@ -301,38 +449,36 @@ class MultiproprietService:
         if invitation.group.group_status != PropertyGroupStatus.ACTIVE:
             raise ValueError("Le groupe n'est plus actif")
         
-        # Créer ou mettre à jour le membership
-        existing_member = db.query(PropertyGroupMember).filter(
-            PropertyGroupMember.group_id == invitation.group_id,
-            PropertyGroupMember.user_id == user_id
-        ).first()
-        
-        if existing_member:
-            # Réactiver un ancien membre
-            existing_member.membership_status = MembershipStatus.ACTIVE
-            existing_member.joined_at = datetime.utcnow()
-            member = existing_member
-        else:
-            # Créer un nouveau membre
-            member = PropertyGroupMember(
-                group_id=invitation.group_id,
-                user_id=user_id,
-                membership_status=MembershipStatus.ACTIVE,
-                role_in_group="member",
-                invited_by_id=invitation.invited_by_id,
-                invitation_message=invitation.invitation_message,
-                joined_at=datetime.utcnow()
-            )
-            db.add(member)
+        # Créer ou réactiver le membership en une instruction, sans course entre deux
+        # acceptations (clé unique group_id + user_id) ; l'UPDATE du doublon ne passe
+        # pas par l'ORM : updated_at est repris explicitement
+        group_id = invitation.group_id
+        upsert = mysql_insert(PropertyGroupMember).values(
+            group_id=group_id,
+            user_id=user_id,
+            membership_status=MembershipStatus.ACTIVE,
+            role_in_group="member",
+            invited_by_id=invitation.invited_by_id,
+            invitation_message=invitation.invitation_message,
+            joined_at=func.now()
+        )
+        db.execute(upsert.on_duplicate_key_update(
+            membership_status=MembershipStatus.ACTIVE,
+            joined_at=func.now(),
+            updated_at=func.now()
+        ))
         
         # Marquer l'invitation comme acceptée
         invitation.status = "accepted"
-        invitation.responded_at = datetime.utcnow()
+        invitation.responded_at = func.now()
         
         db.commit()
-        db.refresh(member)
+        MultiproprietService._invalidate_quotas(db)
         
-        return member
+        return db.query(PropertyGroupMember).filter(
+            PropertyGroupMember.group_id == group_id,
+            PropertyGroupMember.user_id == user_id
+        ).one()
     
     @staticmethod
     def add_apartment_to_group(
@@ -373,6 +519,7 @@ class MultiproprietService:
         # Ajouter l'appartement au groupe
         apartment.property_group_id = group_id
         db.commit()
+        MultiproprietService._invalidate_quotas(db)
         
         return True
     
@@ -384,43 +531,52 @@ class MultiproprietService:
         quotas = MultiproprietService.get_user_apartment_quotas(db, user_id)
         
         # Groupes sponsorisés
-        sponsored_groups = []
         user_sponsored_groups = db.query(PropertyGroup).filter(
             PropertyGroup.sponsor_id == user_id,
             PropertyGroup.group_status == PropertyGroupStatus.ACTIVE
         ).all()
         
-        for group in user_sponsored_groups:
-            sponsored_groups.append({
-                "id": group.id,
-                "name": group.name,
-                "type": group.group_type,
-                "members_count": group.active_members_count,
-                "apartments_count": group.apartments_count,
-                "created_at": group.created_at
-            })
-        
-        # Groupes où l'utilisateur est membre
-        member_groups = []
-        user_memberships = db.query(PropertyGroupMember).filter(
+        # Groupes où l'utilisateur est membre (groupe déjà joint, sponsor chargé avec)
+        user_memberships = db.query(PropertyGroupMember).join(PropertyGroup).filter(
             PropertyGroupMember.user_id == user_id,
-            PropertyGroupMember.membership_status == MembershipStatus.ACTIVE
-        ).join(PropertyGroup).filter(
+            PropertyGroupMember.membership_status == MembershipStatus.ACTIVE,
             PropertyGroup.sponsor_id != user_id,  # Pas ses propres groupes
             PropertyGroup.group_status == PropertyGroupStatus.ACTIVE
+        ).options(
+            contains_eager(PropertyGroupMember.group).joinedload(PropertyGroup.sponsor)
         ).all()
         
-        for membership in user_memberships:
-            group = membership.group
-            member_groups.append({
+        # Compteurs de membres actifs et d'appartements de tous ces groupes en une requête
+        group_counts = MultiproprietService._get_group_counts(
+            db,
+            [group.id for group in user_sponsored_groups]
+            + [membership.group_id for membership in user_memberships]
+        )
+        
+        sponsored_groups = [
+            {
                 "id": group.id,
                 "name": group.name,
                 "type": group.group_type,
-                "sponsor_email": group.sponsor.email,
+                "members_count": group_counts[group.id][0],
+                "apartments_count": group_counts[group.id][1],
+                "created_at": group.created_at
+            }
+            for group in user_sponsored_groups
+        ]
+        
+        member_groups = [
+            {
+                "id": membership.group_id,
+                "name": membership.group.name,
+                "type": membership.group.group_type,
+                "sponsor_email": membership.group.sponsor.email,
                 "role": membership.role_in_group,
-                "apartments_count": group.apartments_count,
+                "apartments_count": group_counts[membership.group_id][1],
                 "joined_at": membership.joined_at
-            })
+            }
+            for membership in user_memberships
+        ]
         
         return MultiproprieteDashboard(
             personal_apartments=quotas["personal_apartments"],
@@ -433,6 +589,31 @@ class MultiproprietService:
             can_create_groups=quotas["can_sponsor_groups"]
         )
     
+    @staticmethod
+    def _get_group_counts(db: Session, group_ids: List[int]) -> Dict[int, Tuple[int, int]]:
+        """
+        Nombre de membres actifs et d'appartements par groupe, en une requête
+        (sous-requêtes corrélées : pas de produit membres x appartements)
+        Retourne un dict group_id -> (membres actifs, appartements)
+        """
+        if not group_ids:
+            return {}
+        
+        members_count = db.query(func.count(PropertyGroupMember.id)).filter(
+            PropertyGroupMember.group_id == PropertyGroup.id,
+            PropertyGroupMember.membership_status == MembershipStatus.ACTIVE
+        ).correlate(PropertyGroup).scalar_subquery()
+        apartments_count = db.query(func.count(Apartment.id)).filter(
+            Apartment.property_group_id == PropertyGroup.id
+        ).correlate(PropertyGroup).scalar_subquery()
+        
+        return {
+            group_id: (members, apartments)
+            for group_id, members, apartments in db.query(
+                PropertyGroup.id, members_count, apartments_count
+            ).filter(PropertyGroup.id.in_(set(group_ids)))
+        }
+    
     @staticmethod
     def suspend_group_if_sponsor_not_premium(db: Session, group_id: int) -> bool:
         """
@@ -443,85 +624,131 @@ class MultiproprietService:
             return False
         
         # Vérifier le statut d'abonnement du sponsor
-        subscription = SubscriptionService.get_user_subscription(db, group.sponsor_id)
-        is_premium = subscription.get("type") == SubscriptionType.PREMIUM
+        is_premium = MultiproprietService._is_premium(db, group.sponsor_id)
         
         if not is_premium and group.group_status == PropertyGroupStatus.ACTIVE:
             # Suspendre le groupe
             group.group_status = PropertyGroupStatus.SUSPENDED
             db.commit()
+            MultiproprietService._invalidate_quotas(db)
             return True
         
         elif is_premium and group.group_status == PropertyGroupStatus.SUSPENDED:
             # Réactiver le groupe
             group.group_status = PropertyGroupStatus.ACTIVE
             db.commit()
+            MultiproprietService._invalidate_quotas(db)
             return True
         
         return False
     
     @staticmethod
-    def get_user_accessible_apartments(db: Session, user_id: int) -> List[Dict[str, Any]]:
+    def suspend_groups_bulk(db: Session) -> Dict[str, int]:
+        """
+        Variante groupée de suspend_group_if_sponsor_not_premium pour tous les groupes :
+        une lecture des groupes, une des abonnements des sponsors, un UPDATE par statut
+        et un seul commit. Retourne le nombre de groupes suspendus et réactivés
+        """
+        groups = db.query(
+            PropertyGroup.id, PropertyGroup.sponsor_id, PropertyGroup.group_status
+        ).filter(
+            PropertyGroup.group_status.in_([PropertyGroupStatus.ACTIVE, PropertyGroupStatus.SUSPENDED])
+        ).all()
+        if not groups:
+            return {"suspended": 0, "reactivated": 0}
+        
+        subscriptions = SubscriptionService.get_user_subscriptions_bulk(
+            db, {sponsor_id for _, sponsor_id, _ in groups}
+        )
+        to_suspend, to_reactivate = [], []
+        for group_id, sponsor_id, group_status in groups:
+            is_premium = subscriptions[sponsor_id].get("type") == SubscriptionType.PREMIUM
+            if not is_premium and group_status == PropertyGroupStatus.ACTIVE:
+                to_suspend.append(group_id)
+            elif is_premium and group_status == PropertyGroupStatus.SUSPENDED:
+                to_reactivate.append(group_id)
+        
+        for group_ids, new_status in (
+            (to_suspend, PropertyGroupStatus.SUSPENDED),
+            (to_reactivate, PropertyGroupStatus.ACTIVE)
+        ):
+            if group_ids:
+                db.query(PropertyGroup).filter(
+                    PropertyGroup.id.in_(group_ids)
+                ).update({"group_status": new_status}, synchronize_session=False)
+        
+        if to_suspend or to_reactivate:
+            db.commit()
+            MultiproprietService._invalidate_quotas(db)
+        
+        return {"suspended": len(to_suspend), "reactivated": len(to_reactivate)}
+    
+    @staticmethod
+    def get_user_accessible_apartments(db: Session, user_id: int) -> Iterator[Dict[str, Any]]:
         """
-        Récupère tous les appartements accessibles par un utilisateur (personnels + groupes)
+        Parcourt tous les appartements accessibles par un utilisateur (personnels + groupes)
+        Chaque entrée : apartment_id, type_logement, floor, building_name, access_type,
+        role, group_name, sponsor_email. Les lignes sont lues par lots (curseur serveur) :
+        la mémoire ne dépend pas du nombre d'appartements
         """
-        apartments_data = []
+        # Mêmes colonnes pour les trois branches (tuples, pas d'instances Apartment) :
+        # l'immeuble en jointure externe, le type d'accès en colonne discriminante
+        def access_columns(group_name, sponsor_email, role, access_type: str):
+            return (
+                Apartment.id.label("apartment_id"),
+                Apartment.type_logement,
+                Apartment.floor,
+                Building.name.label("building_name"),
+                group_name.label("group_name"),
+                sponsor_email.label("sponsor_email"),
+                role.label("role"),
+                literal(access_type).label("access_type")
+            )
         
         # Appartements personnels
-        personal_apartments = db.query(Apartment).join(ApartmentUserLink).filter(
+        personal_apartments = db.query(
+            *access_columns(null(), null(), literal("owner"), "personal")
+        ).join(
+            ApartmentUserLink, ApartmentUserLink.apartment_id == Apartment.id
+        ).outerjoin(
+            Building, Apartment.building_id == Building.id
+        ).filter(
             ApartmentUserLink.user_id == user_id,
             Apartment.property_group_id.is_(None)
-        ).all()
+        )
         
-        for apt in personal_apartments:
-            apartments_data.append({
-                "apartment": apt,
-                "access_type": "personal",
-                "role": "owner",
-                "group_name": None,
-                "sponsor_email": None
-            })
-        
-        # Appartements via groupes sponsorisés
-        sponsored_apartments = db.query(Apartment).join(PropertyGroup).filter(
+        # Appartements via groupes sponsorisés (nom du groupe et email du sponsor projetés)
+        sponsored_apartments = db.query(
+            *access_columns(PropertyGroup.name, UserAuth.email, literal("sponsor"), "sponsored")
+        ).join(
+            PropertyGroup, Apartment.property_group_id == PropertyGroup.id
+        ).join(
+            UserAuth, PropertyGroup.sponsor_id == UserAuth.id
+        ).outerjoin(
+            Building, Apartment.building_id == Building.id
+        ).filter(
             PropertyGroup.sponsor_id == user_id,
-            PropertyGroup.group_status == PropertyGroupStatus.ACTIVE,
-            Apartment.property_group_id == PropertyGroup.id
-        ).all()
+            PropertyGroup.group_status == PropertyGroupStatus.ACTIVE
+        )
         
-        for apt in sponsored_apartments:
-            apartments_data.append({
-                "apartment": apt,
-                "access_type": "sponsored",
-                "role": "sponsor",
-                "group_name": apt.property_group.name,
-                "sponsor_email": apt.property_group.sponsor.email
-            })
-        
-        # Appartements via memberships
-        member_apartments = db.query(Apartment).join(PropertyGroup).join(
+        # Appartements via memberships : le rôle vient de la jointure sur le membership
+        member_apartments = db.query(
+            *access_columns(PropertyGroup.name, UserAuth.email, PropertyGroupMember.role_in_group, "member")
+        ).join(
+            PropertyGroup, Apartment.property_group_id == PropertyGroup.id
+        ).join(
             PropertyGroupMember, PropertyGroup.id == PropertyGroupMember.group_id
+        ).join(
+            UserAuth, PropertyGroup.sponsor_id == UserAuth.id
+        ).outerjoin(
+            Building, Apartment.building_id == Building.id
         ).filter(
             PropertyGroupMember.user_id == user_id,
             PropertyGroupMember.membership_status == MembershipStatus.ACTIVE,
             PropertyGroup.group_status == PropertyGroupStatus.ACTIVE,
             PropertyGroup.sponsor_id != user_id
-        ).all()
+        )
         
-        for apt in member_apartments:
-            # Trouver le rôle dans le groupe
-            membership = next(
-                (m for m in apt.property_group.members 
-                 if m.user_id == user_id and m.membership_status == MembershipStatus.ACTIVE),
-                None
-            )
-            
-            apartments_data.append({
-                "apartment": apt,
-                "access_type": "member",
-                "role": membership.role_in_group if membership else "member",
-                "group_name": apt.property_group.name,
-                "sponsor_email": apt.property_group.sponsor.email
-            })
-        
-        return apartments_data
\ No newline at end of file
+        # Une seule requête UNION ALL, lue par lots
+        for row in personal_apartments.union_all(sponsored_apartments, member_apartments).yield_per(500):
+            yield row._asdict()
\ No newline at end of file
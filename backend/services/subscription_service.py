@@ -2,7 +2,7 @@
 Service de gestion des abonnements
 Centralise la logique métier des abonnements Premium/Gratuit
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
@@ -30,18 +30,75 @@ class SubscriptionService:
             ).first()
             
             if subscription and subscription.status == SubscriptionStatus.ACTIVE:
-                return {
-                    "type": subscription.subscription_type,
-                    "status": subscription.status,
-                    "start_date": subscription.start_date,
-                    "end_date": subscription.end_date,
-                    "stripe_subscription_id": subscription.stripe_subscription_id
-                }
+                return SubscriptionService._subscription_to_dict(subscription)
         except ImportError:
             # Le modèle UserSubscription n'existe pas encore
             pass
         
         # Par défaut, abonnement gratuit
+        return SubscriptionService._free_subscription()
+    
+    @staticmethod
+    def get_user_subscriptions_bulk(db: Session, user_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Récupère les abonnements de plusieurs utilisateurs en une requête
+        Retourne un dict user_id -> même format que get_user_subscription
+        """
+        user_ids = list(user_ids)
+        subscriptions = {user_id: SubscriptionService._free_subscription() for user_id in user_ids}
+        if not user_ids:
+            return subscriptions
+        
+        try:
+            from models import UserSubscription
+            
+            seen = set()
+            for subscription in db.query(UserSubscription).filter(
+                UserSubscription.user_id.in_(user_ids)
+            ):
+                # Comme get_user_subscription : seule la première ligne par utilisateur compte
+                if subscription.user_id in seen:
+                    continue
+                seen.add(subscription.user_id)
+                if subscription.status == SubscriptionStatus.ACTIVE:
+                    subscriptions[subscription.user_id] = SubscriptionService._subscription_to_dict(subscription)
+        except ImportError:
+            # Le modèle UserSubscription n'existe pas encore
+            pass
+        
+        return subscriptions
+    
+    @staticmethod
+    def get_breakdown(db: Session) -> Dict[SubscriptionType, int]:
+        """
+        Nombre d'abonnements actifs par type (une requête GROUP BY)
+        Les utilisateurs sans abonnement actif ne sont pas comptés (gratuits par défaut)
+        """
+        try:
+            from models import UserSubscription
+        except ImportError:
+            return {}
+        
+        return dict(db.query(
+            UserSubscription.subscription_type, func.count()
+        ).filter(
+            UserSubscription.status == SubscriptionStatus.ACTIVE
+        ).group_by(UserSubscription.subscription_type).all())
+    
+    @staticmethod
+    def _subscription_to_dict(subscription) -> Dict[str, Any]:
+        """Format dict d'un abonnement actif"""
+        return {
+            "type": subscription.subscription_type,
+            "status": subscription.status,
+            "start_date": subscription.start_date,
+            "end_date": subscription.end_date,
+            "stripe_subscription_id": subscription.stripe_subscription_id
+        }
+    
+    @staticmethod
+    def _free_subscription() -> Dict[str, Any]:
+        """Abonnement gratuit par défaut"""
         return {
             "type": SubscriptionType.FREE,
             "status": SubscriptionStatus.ACTIVE,
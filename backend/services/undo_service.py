@@ -337,7 +337,7 @@ class UndoService:
                     return False, f"Un utilisateur avec l'ID {audit_log.entity_id} existe déjà"
                 
                 # Recréer l'utilisateur
-                user_data = backup.full_backup_data
+                user_data = backup.backup_data
                 user = UserAuth(**user_data)
                 db.add(user)
                 
@@ -346,7 +346,7 @@ class UndoService:
             
             elif audit_log.entity_type == EntityType.PHOTO:
                 # Recréer la photo
-                photo_data = backup.full_backup_data
+                photo_data = backup.backup_data
                 photo = Photo(**photo_data)
                 db.add(photo)
                 
@@ -489,7 +489,7 @@ class UndoService:
             ).first()
             
             if backup:
-                preview["affected_data"] = backup.full_backup_data
+                preview["affected_data"] = backup.backup_data
                 if backup.files_backup_path:
                     preview["warnings"].append("Restaurera également les fichiers associés")
             else:
@@ -13,6 +13,7 @@ from fastapi import HTTPException
 from models import UserSubscription, Payment, UserAuth, SubscriptionType, SubscriptionStatus, PaymentStatus
 from audit_logger import AuditLogger
 from database import get_db
+from schemas import StripeWebhookEvent, parse_webhook
 
 class StripeConfig:
     """Configuration Stripe (Single Responsibility)"""
@@ -200,12 +201,15 @@ class StripeWebhookService:
         self.config = config
         self.audit_logger = audit_logger
     
-    def verify_webhook(self, payload: bytes, signature: str) -> stripe.Event:
-        """Vérifie la signature du webhook"""
+    def verify_webhook(self, payload: bytes, signature: str) -> StripeWebhookEvent:
+        """Vérifie la signature du webhook puis valide le corps brut"""
         try:
-            return stripe.Webhook.construct_event(
-                payload, signature, self.config.webhook_secret
+            # Tolérance explicite : sans elle l'horodatage n'est pas vérifié (rejeu possible)
+            stripe.WebhookSignature.verify_header(
+                payload, signature, self.config.webhook_secret,
+                tolerance=stripe.Webhook.DEFAULT_TOLERANCE
             )
+            return parse_webhook(payload)
         except ValueError:
             raise HTTPException(status_code=400, detail="Payload invalide")
         except stripe.error.SignatureVerificationError:
@@ -297,12 +301,12 @@ class StripeService:
         """Traite un webhook Stripe"""
         event = self.webhook_service.verify_webhook(payload, signature)
         
-        if event['type'] == 'customer.subscription.created':
-            self.webhook_service.handle_subscription_created(event['data'], db)
-        elif event['type'] == 'invoice.payment_succeeded':
-            self.webhook_service.handle_invoice_payment_succeeded(event['data'], db)
+        if event.type == 'customer.subscription.created':
+            self.webhook_service.handle_subscription_created(event.data, db)
+        elif event.type == 'invoice.payment_succeeded':
+            self.webhook_service.handle_invoice_payment_succeeded(event.data, db)
         
-        return {"status": "success", "event_type": event['type']}
+        return {"status": "success", "event_type": event.type}
     
     def get_subscription_info(self, user_id: int, db: Session) -> Optional[UserSubscription]:
         """Récupère les informations d'abonnement d'un utilisateur"""
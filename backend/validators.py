@@ -3,8 +3,18 @@ Validateurs réutilisables pour l'application LocAppart
 Centralisation de toute la logique de validation pour éviter la duplication
 """
 import re
-from typing import Optional
-from pydantic import field_validator, ValidationInfo
+from typing import Annotated, Optional
+from pydantic import StringConstraints, field_validator, ValidationInfo
+
+from constants import VALIDATION_PATTERNS
+
+
+# Email validé par une seule regex compilée (sans email_validator), pour les schémas
+# très sollicités comme la connexion admin et les invitations
+Email = Annotated[
+    str,
+    StringConstraints(strip_whitespace=True, to_lower=True, max_length=254, pattern=VALIDATION_PATTERNS["email"])
+]
 
 
 class CommonValidators: